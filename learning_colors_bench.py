@@ -0,0 +1,379 @@
+""" Headless benchmark harness for the Learning Colors Game """
+
+# --- import modules ---
+import os
+import sys
+import io
+import gc
+import json
+import time
+import wave
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+
+# Dummy drivers must be selected before pygame initializes its subsystems
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game module goes first: its STARTED_AT is where time to first frame is measured from, imports included
+import learning_colors_game as game_module
+import pygame
+
+# --- Scripted scenarios ---
+# Each step is "<mode>.<ui element>" and is replayed once the game is idle on that screen.
+# "colors.answer.right" / "colors.answer.wrong" tap the correct square or any other one.
+FULL_ROUND = (
+    ["menu.options", "options.toggle.red", "options.toggle.blue", "options.plus", "options.ok"]
+    + ["colors.answer.wrong", "colors.answer.right", "colors.next"] * 9
+    + ["colors.answer.wrong", "colors.answer.right", "game_over.exit"]
+)
+PALETTE_PAGING = (
+    ["menu.options"]
+    + ["options.page_next"] * 20 + ["options.page_prev"] * 20
+    + ["options.toggle.shade0001", "options.force.shade0001", "options.back", "menu.quit"]
+)
+# One soak cycle: a round with a wrong and a right tap per question, then New Game and a settings change
+SOAK_ROUND = ["colors.answer.wrong", "colors.answer.right", "colors.next"] * 9 + ["colors.answer.wrong", "colors.answer.right"]
+SOAK_NEW_GAME = ["game_over.new_game", "options.toggle.red", "options.toggle.red", "options.ok"]
+SOAK_SAMPLE_INTERVAL = 50 # Rounds between memory samples
+SOAK_MAX_GROWTH_BYTES = 1024 # Traced allocation growth per round that fails the soak
+SOAK_TOP_SITES = 10 # Call sites listed in the growth report
+SOAK_FRAME_HISTORY = 256 # Frame measurements kept by the soak scheduler
+STALL_LIMIT = 2000 # Idle waits without progress before a scenario is declared stuck
+SCENARIOS = {
+    "full_round": FULL_ROUND,
+    "palette_paging": PALETTE_PAGING,
+}
+
+class SilentBackend:
+    """Speech backend that returns a short silent clip, so no network or synthesis is involved."""
+    name = "silent"
+    cacheable = False
+
+    def __init__(self):
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as clip:
+            clip.setnchannels(1)
+            clip.setsampwidth(2)
+            clip.setframerate(22050)
+            clip.writeframes(b"\0\0" * 2205)
+        self.clip = buffer.getvalue()
+
+    def has(self, text, lang):
+        return True
+
+    def synthesize(self, text, lang):
+        return self.clip
+
+class ScriptedScheduler(game_module.FrameScheduler):
+    """Frame scheduler that replays scripted taps instead of sleeping, and measures every frame."""
+    def __init__(self, clock, script, started_at):
+        super().__init__(clock)
+        self.script = deque(script)
+        self.started_at = started_at
+        self.game = None
+        self.first_frame_ms = None
+        self.frame_times = [] # Seconds of work between two scheduler calls
+        self.block_deltas = [] # Net allocated blocks per frame
+        self.transitions = [] # Seconds from a "Next" tap to the new question on screen
+        self.frame_started = None
+        self.blocks_started = 0
+        self.transition_started = None
+        self.stalled = 0
+
+    def events(self, mode, busy=False, timeout_ms=game_module.IDLE_WAIT_MS):
+        game_module.profiler.idle_started()
+        now = time.perf_counter()
+        if self.frame_started is None:
+            self.first_frame_ms = (now - self.started_at) * 1000
+        else:
+            self.frame_times.append(now - self.frame_started)
+            self.block_deltas.append(sys.getallocatedblocks() - self.blocks_started)
+        if self.transition_started is not None:
+            self.transitions.append(now - self.transition_started)
+            self.transition_started = None
+
+        events = pygame.event.get()
+        if not busy and not events:
+            event = self.next_scripted_event(mode)
+            if event is not None:
+                events.append(event)
+            else:
+                self.stalled += 1
+                if self.stalled > STALL_LIMIT:
+                    raise RuntimeError(f"Scenario is stuck in {mode} at step {self.script[0]}")
+                # Nothing to replay yet (a timer or a speech clip is pending), so wait like the game would
+                event = pygame.event.wait(max(1, min(int(timeout_ms), 5)))
+                if event.type != pygame.NOEVENT:
+                    events.append(event)
+        self.account(mode)
+
+        self.frame_started = time.perf_counter()
+        self.blocks_started = sys.getallocatedblocks()
+        return events
+
+    def next_scripted_event(self, mode):
+        """Returns the tap for the next step if it applies to the current screen."""
+        if not self.script:
+            return pygame.event.Event(pygame.QUIT)
+        step_mode, target = self.script[0].split(".", 1)
+        if step_mode != mode:
+            return None
+        if target.startswith("answer."):
+            if self.game.question is None:
+                return None
+            target_color = self.game.question["target"]
+            squares = self.game.question["squares"]
+            if target == "answer.right":
+                rect = squares[target_color]
+            else:
+                rect = next(r for color, r in squares.items() if color != target_color)
+        else:
+            rect = self.game.ui.get(target)
+            if rect is None:
+                return None
+        self.script.popleft()
+        self.stalled = 0
+        if target == "next":
+            self.transition_started = time.perf_counter()
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=rect.center, button=1)
+
+class SoakScheduler(ScriptedScheduler):
+    """Scripted scheduler that plays rounds and samples memory every interval rounds once the bounded buffers are full.
+
+    Steps are dealt one round at a time so the script itself does not shrink under the measurements.
+    """
+    def __init__(self, clock, rounds, started_at, interval):
+        super().__init__(clock, ["menu.options", "options.ok"], started_at)
+        self.to_deal = rounds
+        # Per-frame measurements are not reported here; bounded so they do not count as growth
+        self.frame_times = deque(maxlen=SOAK_FRAME_HISTORY)
+        self.block_deltas = deque(maxlen=SOAK_FRAME_HISTORY)
+        self.transitions = deque(maxlen=SOAK_FRAME_HISTORY)
+        self.interval = interval
+        self.rounds = 0
+        self.filling = None # Sizes of the buffers still filling at the end of the previous round
+        self.first_sample = None # Round the buffers stopped filling
+        self.samples = [] # {"round", "traced_bytes", "rss_kb"}
+        self.baseline = None # tracemalloc snapshot of the first sample
+        self.snapshot = None # Latest tracemalloc snapshot
+
+    def next_scripted_event(self, mode):
+        if not self.script and self.to_deal:
+            self.to_deal -= 1
+            self.script.extend(SOAK_ROUND + (SOAK_NEW_GAME if self.to_deal else ["game_over.exit"]))
+        step = self.script[0] if self.script else None
+        event = super().next_scripted_event(mode)
+        if event is not None and step in ("game_over.new_game", "game_over.exit"):
+            self.rounds += 1
+            if self.first_sample is None:
+                # Bounded buffers grow until they are full; sample from the first round that grew none of them
+                filling = self.buffers_filling()
+                if filling == self.filling:
+                    self.first_sample = self.rounds
+                self.filling = filling
+            if self.first_sample is not None and (self.rounds - self.first_sample) % self.interval == 0:
+                self.sample()
+        return event
+
+    def buffers_filling(self):
+        """Sizes of the game's and this scheduler's bounded buffers and caches that are not full yet."""
+        buffers = [self.frame_times, self.block_deltas, self.transitions, *game_module.profiler.history.values(), *self.game.audio.latencies.values()]
+        if self.game.deck is not None:
+            buffers.append(self.game.deck.swaps)
+        caches = [(game_module.text_cache.surfaces, game_module.text_cache.max_entries), (game_module.speech_cache.sounds, game_module.speech_cache.max_sounds)]
+        return [len(buffer) for buffer in buffers if len(buffer) < buffer.maxlen] + [len(cache) for cache, limit in caches if len(cache) < limit]
+
+    def sample(self):
+        gc.collect()
+        # Only the game's memory counts: not tracemalloc's, the import machinery's or this harness's own records
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, __file__),
+        ])
+        if self.baseline is None:
+            self.baseline = snapshot
+        self.snapshot = snapshot
+        traced_bytes = sum(stat.size for stat in snapshot.statistics("filename"))
+        self.samples.append({"round": self.rounds, "traced_bytes": traced_bytes, "rss_kb": rss_kb()})
+
+def rss_kb():
+    """Resident set size of this process in KiB, None where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def growth_per_round(samples, key):
+    """Least-squares slope of samples[key] over the round number, None with fewer than two samples."""
+    points = [(sample["round"], sample[key]) for sample in samples if sample[key] is not None]
+    if len(points) < 2:
+        return None
+    mean_round = sum(r for r, _ in points) / len(points)
+    mean_value = sum(v for _, v in points) / len(points)
+    spread = sum((r - mean_round) ** 2 for r, _ in points)
+    return sum((r - mean_round) * (v - mean_value) for r, v in points) / spread
+
+def run_soak(rounds, seed=0, interval=SOAK_SAMPLE_INTERVAL, max_growth=SOAK_MAX_GROWTH_BYTES):
+    """Plays rounds scripted rounds and returns the memory growth measured between the samples."""
+    random.seed(seed)
+    game_module.speech_backends = [SilentBackend()]
+    game_module.GAME_OVER_DELAY_MS = 0 # The pause is for the learner's eyes; a soak has thousands of rounds to play
+    log_dir = tempfile.mkdtemp(prefix="soak-logs-") # Scripted taps stay out of the real answer logs
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    game = game_module.MainGame(profile_db=":memory:", watch=False, answer_log_dir=log_dir)
+    scheduler = SoakScheduler(game.clock, rounds, started_at, interval)
+    scheduler.game = game
+    game.scheduler = scheduler
+    try:
+        game.run()
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(log_dir, ignore_errors=True)
+    if scheduler.script or scheduler.to_deal:
+        raise RuntimeError(f"Soak stopped after {scheduler.rounds} of {rounds} rounds")
+    growth = growth_per_round(scheduler.samples, "traced_bytes")
+    rss_growth = growth_per_round(scheduler.samples, "rss_kb")
+    sites = []
+    if scheduler.baseline is not scheduler.snapshot:
+        for stat in scheduler.snapshot.compare_to(scheduler.baseline, "lineno")[:SOAK_TOP_SITES]:
+            frame = stat.traceback[0]
+            sites.append({"site": f"{frame.filename}:{frame.lineno}", "size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff})
+    return {
+        "rounds": scheduler.rounds,
+        "seed": seed,
+        "wall_time_s": round(time.perf_counter() - started_at, 3),
+        "buffers_full_at_round": scheduler.first_sample,
+        "samples": scheduler.samples,
+        "traced_growth_bytes_per_round": round(growth, 1) if growth is not None else None,
+        "rss_growth_kb_per_round": round(rss_growth, 2) if rss_growth is not None else None,
+        "max_growth_bytes_per_round": max_growth,
+        "growth_ok": growth is not None and growth <= max_growth, # Fewer than two samples measure nothing
+        "top_growth_sites": sites,
+        "speech": game.speech.stats(),
+        "text_cache": game_module.text_cache.stats(),
+    }
+
+def generated_palette(size):
+    """Returns a ColorCatalog of size evenly spread shades."""
+    entries = []
+    for index in range(size):
+        color = pygame.Color(0)
+        color.hsva = (360 * index / size, 40 + 60 * (index % 3) / 2, 40 + 60 * (index % 5) / 4, 100)
+        entries.append({"name": f"shade{index:04d}", "rgb": tuple(color)[:3], "toggle": index < 2})
+    return game_module.ColorCatalog.from_entries(entries)
+
+def benchmark_hit_testing(game, clicks=100000):
+    """Times PaletteGrid.hit over random points on the options screen."""
+    grid = game_module.PaletteGrid(game.COLOR_NAMES, game.layout("options")["available"])
+    rng = random.Random(0)
+    points = [(rng.randrange(game.screen_width), rng.randrange(game.screen_height)) for _ in range(clicks)]
+    started = time.perf_counter()
+    hits = 0
+    for page in range(grid.pages):
+        grid.set_page(page)
+        for point in points[page::grid.pages]:
+            hits += grid.hit(point) is not None
+    elapsed = time.perf_counter() - started
+    return {"clicks": clicks, "hits": hits, "pages": grid.pages, "ns_per_hit_test": round(1e9 * elapsed / clicks, 1)}
+
+def percentiles(samples, points=(50, 90, 99)):
+    """Returns the requested percentiles of samples in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    result = {f"p{p}": round(1000 * ordered[min(len(ordered) - 1, len(ordered) * p // 100)], 3) for p in points}
+    result["max"] = round(1000 * ordered[-1], 3)
+    return result
+
+def run_benchmark(scenario="full_round", seed=0, palette_size=None, ttff_target_ms=game_module.TTFF_TARGET_MS):
+    """Runs MainGame through a scripted scenario and returns its measurements."""
+    random.seed(seed)
+    game_module.speech_backends = [SilentBackend()]
+    harness_started = time.perf_counter()
+    catalog = generated_palette(palette_size) if palette_size else None
+    log_dir = tempfile.mkdtemp(prefix="bench-logs-") # Scripted taps stay out of the real answer logs
+    started_at = time.perf_counter()
+    game = game_module.MainGame(catalog, profile_db=":memory:", watch=False, answer_log_dir=log_dir)
+    # The game builds its own catalog on the loader thread; building the generated one here is not startup time
+    scheduler = ScriptedScheduler(game.clock, SCENARIOS[scenario], game_module.STARTED_AT + started_at - harness_started)
+    scheduler.game = game
+    game.scheduler = scheduler
+    try:
+        game.run()
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+    if scheduler.script:
+        raise RuntimeError(f"Scenario stopped with steps left: {list(scheduler.script)}")
+    results = {
+        "scenario": scenario,
+        "seed": seed,
+        "palette_size": len(game.COLOR_NAMES),
+        "wall_time_s": round(time.perf_counter() - started_at, 3),
+        "time_to_first_frame_ms": round(scheduler.first_frame_ms, 3),
+        "time_to_first_frame_target_ms": ttff_target_ms,
+        "time_to_first_frame_ok": scheduler.first_frame_ms <= ttff_target_ms,
+        "startup": game_module.startup.stats(),
+        "frames": len(scheduler.frame_times),
+        "frame_time_ms": percentiles(scheduler.frame_times),
+        "question_transition_ms": percentiles(scheduler.transitions),
+        "allocated_blocks_per_frame": {
+            "mean": round(sum(scheduler.block_deltas) / max(1, len(scheduler.block_deltas)), 1),
+            "max": max(scheduler.block_deltas, default=0),
+        },
+        "text_cache": game_module.text_cache.stats(),
+        "speech": game.speech.stats(),
+        "audio": game.audio.stats(),
+        "question_deck": game.deck.stats() if game.deck is not None else None,
+        "tap_latency": game_module.tap_latency.stats(),
+    }
+    if palette_size:
+        results["palette_hit_testing"] = benchmark_hit_testing(game)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmark for the Learning Colors Game")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="full_round")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--palette", type=int, help="replace the color catalog with this many generated shades, e.g. 1000")
+    parser.add_argument("--ttff-target-ms", type=float, default=game_module.TTFF_TARGET_MS, help="fail if the first frame takes longer than this")
+    parser.add_argument("--soak", type=int, metavar="ROUNDS", help="play this many rounds and track memory growth instead of running a scenario")
+    parser.add_argument("--soak-interval", type=int, default=SOAK_SAMPLE_INTERVAL, help="rounds between memory samples")
+    parser.add_argument("--max-growth", type=float, default=SOAK_MAX_GROWTH_BYTES, help="fail the soak above this many traced bytes per round")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    if args.soak and args.soak <= args.soak_interval:
+        parser.error(f"--soak needs more than --soak-interval ({args.soak_interval}) rounds to take two memory samples")
+
+    if args.soak:
+        results = run_soak(args.soak, args.seed, args.soak_interval, args.max_growth)
+    else:
+        results = run_benchmark(args.scenario, args.seed, args.palette, args.ttff_target_ms)
+    text = json.dumps(results, indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+    if args.soak:
+        if results["traced_growth_bytes_per_round"] is None:
+            print(f"Error: the soak took fewer than two memory samples (buffers full at round {results['buffers_full_at_round']}), play more rounds", file=sys.stderr)
+            return 1
+        if not results["growth_ok"]:
+            print(f"Error: memory grew {results['traced_growth_bytes_per_round']} bytes per round, limit is {args.max_growth}", file=sys.stderr)
+            return 1
+        return 0
+    if not results["time_to_first_frame_ok"]:
+        print(f"Error: first frame took {results['time_to_first_frame_ms']} ms, target is {args.ttff_target_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
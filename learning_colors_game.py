@@ -1,19 +1,117 @@
 """ This is a learning game template """
 
 # --- import modules ---
+import time
+STARTED_AT = time.perf_counter() # Origin of the startup timeline, taken before the heavy imports
 import os
+import re
+import sys
 import json
 import io
+import hashlib
+import argparse
+import csv
 import pygame
 import random
-from gtts import gTTS
+import numpy as np
+import threading
+import heapq
+import queue
+import socket
+import uuid
+import sqlite3
+import mmap
+import shutil
+import struct
+import subprocess
+import zlib
+import glob
+import ctypes
+import ctypes.util
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+# gtts (which pulls in requests) and scipy are imported on first use, see GTTSBackend and kd_tree_type
 
 # --- Global Constants and Configuration ---
-CONFIG_FILE_PATH = "game_config.json"
+CONFIG_FILE_PATH = "learning_colors_config.json"
+CONFIG_POLL_SECONDS = 1.0 # How often FileWatcher looks at the config, catalog and asset files
 SOUND_ACTION_FILE = "assets/mouse_click.wav"
 SOUND_ERROR_FILE = "assets/nogood.wav"
+ASSET_MANIFEST = "assets/manifest.json" # Sounds and images loaded on demand by AssetRegistry
+UI_ASSETS = ["click", "happy_face", "sad_face"] # Always worth keeping loaded
+ASSET_PACK = "assets.pack" # Built by --build-pack; the loose files in assets/ are used when it is missing
+ASSET_PACK_MAGIC = b"LCGPACK1"
+ASSET_PACK_OGG_QUALITY = 4 # Vorbis quality when an encoder is on the PATH
+SPEECH_CACHE_DIR = "speech_cache"
+SPEECH_CACHE_MAX_BYTES = 20 * 1024 * 1024 # Disk budget for synthesized speech
+SPEECH_CACHE_MAX_SOUNDS = 64 # Decoded Sound objects kept in memory
+TTFF_TARGET_MS = 350 # Budget from importing this module to the first frame on screen, enforced by learning_colors_bench.py
+LOADING_DONE_EVENT = pygame.USEREVENT + 4 # Posted when the background loader has finished
+CONFIG_CHANGED_EVENT = pygame.USEREVENT + 5 # Posted by FileWatcher with the paths of the files that changed
+SCREEN_CHANGED_EVENT = pygame.USEREVENT + 6 # Returned by MainGame.events when a reload changed what is on screen
+FRAME_RATE = 60 # Frame cap while something is animating
+IDLE_WAIT_MS = 1000 # Longest sleep in pygame.event.wait while the screen is static
+GAME_OVER_DELAY_MS = 1000 # How long the last answer stays on screen before the game over screen
+ROUND_QUESTIONS = 10 # Questions per round
+QUESTION_LOOKAHEAD = 2 # Questions kept fully built behind the one on screen
+QUESTION_SWAP_SAMPLES = 256 # Next-question swap times kept for the deck stats
+SPEECH_READY_EVENT = pygame.USEREVENT + 1 # Posted by speech workers so an idle loop wakes to play the clip
+VOICE_END_EVENT = pygame.USEREVENT + 2 # Posted by the mixer when the voice channel finishes a clip
+FEEDBACK_END_EVENT = pygame.USEREVENT + 3 # Same for the feedback channel
+VOICE_PRIORITIES = {"well_done": 0, "prompt": 1, "welcome": 2, "menu": 3} # Lower plays first
+AUDIO_LATENCY_SAMPLES = 256 # Queue latencies kept per kind of clip for the audio report
+PROFILE_PHASES = ["events", "draw", "flip", "speech", "sound", "idle"] # "idle" is the wait or clock.tick pacing
+PROFILE_HISTORY = 240 # Frames kept in the rolling profiler histograms
+PROFILE_OVERLAY_BOTTOM = 60 # Gap between the profiler overlay and the bottom edge, which keeps the hint line visible
+TAP_FEEDBACK_TARGET_MS = 50 # Budget from a tap on a square to its feedback on screen and on the speaker
+TAP_LATENCY_BUCKETS_MS = [5, 10, 20, 33, 50, 100, 250] # Histogram bucket upper bounds; the last bucket is open-ended
+TAP_LATENCY_SAMPLES = 512 # Taps kept per stage for the latency percentiles
+TAP_STAMPS = 64 # Taps whose SDL queue time is remembered until the game reads them
+SDL_TOUCH_DEVICE_DIRECT = 0 # SDL_TouchDeviceType of touchscreens; touchpads already move the pointer
+PROFILE_BUCKETS_MS = [1, 2, 4, 8, 16, 33, 66] # Histogram bucket upper bounds
+PALETTE_CELL_SIZE = 50 # Options checkbox size
+PALETTE_CELL_PITCH = 62 # Distance between neighbouring checkboxes
+PALETTE_MARGIN = 100 # Side margin left free for the page buttons
+PROFILE_DB_PATH = "learners.db" # SQLite store of learner profiles
+DEFAULT_LEARNER = "default"
+ANSWER_LOG_DIR = "logs" # One JSON line per tap, see AnswerLog
+ANSWER_LOG_MAX_BYTES = 8 * 1024 * 1024 # Rotate a day's log file past this size
+ANSWER_LOG_FSYNC_SECONDS = 5.0 # Longest time a written record may sit unsynced
+ANSWER_LOG_BATCH = 256 # Records written per batch at most
+SYNC_PORT = 8765 # Classroom server port, see learning_colors_server.py
+SYNC_OUTBOX = "sync_outbox.jsonl" # Batches not yet acknowledged by the classroom server
+SYNC_BATCH = 64 # Records sent per batch at most
+SYNC_FLUSH_SECONDS = 1.0 # Longest time a record waits for its batch to fill up
+SYNC_RETRY_SECONDS = (1, 30) # Reconnect backoff, first and longest wait
+DIRTY_RENDERING = True # Push only changed regions with display.update(rects) instead of flipping the whole screen
+TEXT_CACHE_MAX_ENTRIES = 256 # Rendered label surfaces kept for reuse between frames
+SPEECH_WORKERS = 2 # Background threads synthesizing and decoding speech
+VOICE_BANK_DIR = "assets/voice" # Pre-rendered clips for offline play
+VOICE_BANK_MANIFEST = "manifest.json"
+SPEECH_BACKENDS = ["bank", "gtts"] # Tried in order; the first one that has a phrase speaks it
+LOCALE_DIR = "assets/locales" # One <code>.json phrase and label table per language
+DEFAULT_LOCALE = "en"
+COLOR_CATALOG_FILE = "assets/colors.json" # Names, RGB values and default toggles of the playable colors
+DIFFICULTY_LEVELS = ["adaptive", "any", "easy", "medium", "hard"] # "adaptive" practices what the learner confuses
+DIFFICULTY_DELTA_E = { # CIELAB distance range between the target and its distractors
+    "adaptive": (0.0, float("inf")),
+    "any": (0.0, float("inf")),
+    "easy": (40.0, float("inf")),
+    "medium": (15.0, 40.0),
+    "hard": (0.0, 15.0),
+}
 FULLSCREEN_RESOLUTION = (1920, 1080)
 WINDOWED_RESOLUTION = (1024, 768)
+CONFIG_DEFAULTS = { # Every key learning_colors_config.json may set; values must have the type of the default
+    "fullscreen": True,
+    "screen_width": WINDOWED_RESOLUTION[0], # Windowed size
+    "screen_height": WINDOWED_RESOLUTION[1],
+    "sounds": [],
+    "pics": [],
+}
+MIN_SCREEN_SIZE = (320, 240)
+ATLAS_REFERENCE_HEIGHT = FULLSCREEN_RESOLUTION[1] # Image sizes in the asset manifest are for this screen height
+ATLAS_MAX_WIDTH = 2048 # Images are packed in rows no wider than this
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
@@ -33,25 +131,55 @@ TEXT_COLOR = BLACK
 TEXT_BOX_COLOR = WHITE
 
 # --- Helper Functions ---
-def load_config():
+def validate_config(raw):
+    """Returns raw on top of CONFIG_DEFAULTS, raising ValueError for unknown keys and values of the wrong type."""
+    if not isinstance(raw, dict):
+        raise ValueError("the configuration must be a JSON object")
+    config = dict(CONFIG_DEFAULTS)
+    for key, value in raw.items():
+        if key not in CONFIG_DEFAULTS:
+            raise ValueError(f"unknown key \"{key}\"")
+        expected = type(CONFIG_DEFAULTS[key])
+        if type(value) is not expected: # Exact type, so true is not taken for a width
+            raise ValueError(f"\"{key}\" must be of type {expected.__name__}")
+        config[key] = value
+    if config["screen_width"] < MIN_SCREEN_SIZE[0] or config["screen_height"] < MIN_SCREEN_SIZE[1]:
+        raise ValueError(f"the screen must be at least {MIN_SCREEN_SIZE[0]}x{MIN_SCREEN_SIZE[1]}")
+    return config
+
+def read_config(path=CONFIG_FILE_PATH):
+    """Reads and validates a configuration file, raising OSError or ValueError."""
+    with open(path, "r", encoding="utf-8") as config_file:
+        return validate_config(json.load(config_file))
+
+def load_config(path=CONFIG_FILE_PATH):
     """Loads configuration from JSON file or uses default values."""
     try:
-        with open(CONFIG_FILE_PATH, "r") as config_file:
-            config = json.load(config_file)
-    except Exception as e:
-        print(f"Error loading configuration. Using default lists. {e}")
-        config = {}
-    return config
+        return read_config(path)
+    except (OSError, ValueError) as e:
+        print(f"Error loading configuration. Using default values. {e}")
+        return dict(CONFIG_DEFAULTS)
+
+def native_resolution():
+    """Returns the desktop size of the first display, or FULLSCREEN_RESOLUTION if it is unknown."""
+    try:
+        sizes = pygame.display.get_desktop_sizes()
+    except (AttributeError, pygame.error):
+        return FULLSCREEN_RESOLUTION
+    return tuple(sizes[0]) if sizes and sizes[0][0] > 0 else FULLSCREEN_RESOLUTION
 
-def toggle_fullscreen(screen, screen_width, screen_height, fullscreen):
+def windowed_resolution(size=WINDOWED_RESOLUTION):
+    """Returns size, shrunk to fit the desktop."""
+    native = native_resolution()
+    return min(size[0], native[0]), min(size[1], native[1])
+
+def toggle_fullscreen(fullscreen_size, windowed_size, fullscreen):
     """Toggles between fullscreen and windowed mode."""
-    is_fullscreen = screen.get_flags() & pygame.FULLSCREEN
-    if not is_fullscreen:
-        screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
+    if not fullscreen:
+        screen = pygame.display.set_mode(fullscreen_size, pygame.FULLSCREEN)
     else:
-        screen = pygame.display.set_mode((screen_width, screen_height))
-    fullscreen = not is_fullscreen
-    return fullscreen, screen
+        screen = pygame.display.set_mode(windowed_size)
+    return not fullscreen, screen
 
 def load_sound(filepath):
     """Loads a sound file and handles potential errors."""
@@ -62,34 +190,1326 @@ def load_sound(filepath):
         print(f"Error loading sound: {e}")
         return None
 
-def generate_speech_sound(text):
-    """Generates and returns a Pygame sound object from text using gTTS."""
-    buffer = io.BytesIO()
-    tts = gTTS(text=text, lang='en')
-    tts.write_to_fp(buffer)
-    buffer.seek(0)
-    sound = pygame.mixer.Sound(buffer)
-    return sound
-
-def generate_speech_sound2(filepath, text):
-    # generate only once
-    if os.path.exists(filepath):
-        print(f"Loading from sound file \"{filepath}\"...")
+class Locale:
+    """Phrases, labels and color names of one language, as shipped in LOCALE_DIR/<code>.json."""
+    def __init__(self, code, table):
+        self.code = code
+        self.name = table["name"]
+        self.speech = table.get("speech", code) # Language code handed to the speech backends
+        self.phrases = table["phrases"]
+        self.labels = table["labels"]
+        self.colors = table.get("colors", {})
+
+    @classmethod
+    def load(cls, code, locale_dir=LOCALE_DIR):
+        with open(os.path.join(locale_dir, f"{code}.json"), "r", encoding="utf-8") as locale_file:
+            return cls(code, json.load(locale_file))
+
+    def label(self, key, **fields):
+        return self.labels[key].format(**fields)
+
+    def color(self, name):
+        """Returns the name of a catalog color in this language; untranslated names are used as they are."""
+        return self.colors.get(name, name)
+
+    def prompt(self, name):
+        return random.choice(self.phrases["prompts"]).format(color=self.color(name))
+
+    def all_phrases(self, color_names):
+        """Returns every phrase the game can speak in this language, in a stable order."""
+        phrases = [self.phrases["welcome"], self.phrases["well_done"]] + self.phrases["right"] + self.phrases["wrong"]
+        phrases += [template.format(color=self.color(name)) for template in self.phrases["prompts"] for name in color_names]
+        return list(dict.fromkeys(phrases))
+
+def available_locales(locale_dir=LOCALE_DIR):
+    """Codes of the installed languages; their tables are only read when one is chosen."""
+    try:
+        return sorted(name[:-len(".json")] for name in os.listdir(locale_dir) if name.endswith(".json"))
+    except OSError:
+        return [DEFAULT_LOCALE]
+
+class SpeechCache:
+    """Content-addressed speech cache: decoded Sounds in memory, encoded clips on disk."""
+    def __init__(self, cache_dir=SPEECH_CACHE_DIR, max_bytes=SPEECH_CACHE_MAX_BYTES, max_sounds=SPEECH_CACHE_MAX_SOUNDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_sounds = max_sounds
+        self.sounds = OrderedDict() # (lang, key) -> pygame.mixer.Sound, least recently used first
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock() # Guards the memory layer; synthesis runs unlocked
+
+    def key(self, text, lang, backend_name):
+        """Returns the content address for a (text, lang, backend) triple."""
+        return hashlib.sha1(json.dumps([backend_name, lang, text]).encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".mp3")
+
+    def get(self, text, lang, backend):
+        """Returns a Sound for text, calling backend.synthesize(text, lang) only on a full miss."""
+        key = self.key(text, lang, backend.name)
+        with self.lock:
+            sound = self.sounds.get((lang, key))
+            if sound is not None:
+                self.sounds.move_to_end((lang, key))
+                self.hits += 1
+                return sound
+
+        path = self.path(key)
+        data = None
+        if backend.cacheable and os.path.exists(path):
+            try:
+                with open(path, "rb") as clip_file:
+                    data = clip_file.read()
+                os.utime(path) # mtime doubles as the LRU timestamp
+                self.disk_hits += 1
+            except OSError as e:
+                print(f"Error reading cached speech \"{path}\": {e}")
+        if data is None:
+            data = backend.synthesize(text, lang)
+            self.misses += 1
+            if backend.cacheable:
+                self.store(key, data)
+
+        sound = pygame.mixer.Sound(io.BytesIO(data))
+        with self.lock:
+            self.sounds[lang, key] = sound
+            while len(self.sounds) > self.max_sounds:
+                self.sounds.popitem(last=False)
+        return sound
+
+    def drop_lang(self, lang):
+        """Evicts the decoded clips of a language from memory; its clips on disk stay cached."""
+        with self.lock:
+            for cache_key in [cache_key for cache_key in self.sounds if cache_key[0] == lang]:
+                del self.sounds[cache_key]
+
+    def store(self, key, data):
+        """Writes a clip atomically, then trims the cache back under its size cap."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self.path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as clip_file:
+                clip_file.write(data)
+                clip_file.flush()
+                os.fsync(clip_file.fileno())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing speech cache: {e}")
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used clips until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".mp3"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError as e:
+                print(f"Error evicting cached speech \"{path}\": {e}")
+
+class GTTSBackend:
+    """Online speech backend using Google Translate's text-to-speech service."""
+    name = "gtts"
+    cacheable = True # Network synthesis is worth keeping on disk
+
+    def has(self, text, lang):
+        return True
+
+    def synthesize(self, text, lang):
+        """Synthesizes text with gTTS and returns the encoded MP3 bytes."""
+        from gtts import gTTS # Deferred: importing gtts and requests costs more than the first frame
+        buffer = io.BytesIO()
+        tts = gTTS(text=text, lang=lang)
+        tts.write_to_fp(buffer)
+        return buffer.getvalue()
+
+class VoiceBankBackend:
+    """Offline speech backend serving clips from a pre-rendered voice bank."""
+    name = "bank"
+    cacheable = False # The bank already lives on disk
+
+    def __init__(self, bank_dir=VOICE_BANK_DIR):
+        self.bank_dir = bank_dir
+        self.current = (None, {}) # (lang, {text: filename}) of the one language whose index is loaded
+
+    def index(self, lang):
+        """Returns the index of lang, replacing the index of the previous language."""
+        loaded_lang, index = self.current
+        if loaded_lang != lang:
+            index = load_voice_bank_index(self.bank_dir, lang)
+            self.current = (lang, index)
+        return index
+
+    def has(self, text, lang):
+        return text in self.index(lang)
+
+    def synthesize(self, text, lang):
+        """Returns the encoded clip for text from the bank."""
+        try:
+            filename = self.index(lang)[text]
+        except KeyError:
+            raise LookupError(f"\"{text}\" ({lang}) is not in the voice bank at {self.bank_dir}")
+        with open(os.path.join(self.bank_dir, lang, filename), "rb") as clip_file:
+            return clip_file.read()
+
+SPEECH_BACKEND_TYPES = {"gtts": GTTSBackend, "bank": VoiceBankBackend}
+
+def load_voice_bank_index(bank_dir, lang):
+    """Loads the {text: filename} index of one language of a voice bank, empty if there is none."""
+    try:
+        with open(os.path.join(bank_dir, lang, VOICE_BANK_MANIFEST), "r", encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Error loading voice bank index: {e}")
+        return {}
+
+def make_speech_backends(names, bank_dir=VOICE_BANK_DIR):
+    return [VoiceBankBackend(bank_dir) if name == "bank" else SPEECH_BACKEND_TYPES[name]() for name in names]
+
+speech_cache = SpeechCache()
+speech_service = None # The running game's SpeechService, for instrumentation
+speech_backends = make_speech_backends(SPEECH_BACKENDS)
+
+def generate_speech_sound(text, lang=DEFAULT_LOCALE):
+    """Returns a Pygame sound object for text from the first backend that can speak it."""
+    for backend in speech_backends:
+        if backend.has(text, lang):
+            return speech_cache.get(text, lang, backend)
+    raise LookupError(f"No speech backend can speak \"{text}\" ({lang})")
+
+def voice_bank_filename(text, lang):
+    """Returns a readable, filesystem-safe file name for a phrase, within its language's directory.
+
+    The slug drops case and punctuation, so a short hash of the exact text and language keeps
+    phrases like "No!" and "No?" apart.
+    """
+    slug = re.sub(r"[^\w]+", "_", text.lower()).strip("_")
+    digest = hashlib.sha1(json.dumps([lang, text]).encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}.mp3" if slug else f"{digest}.mp3"
+
+def _prerender_phrase(job):
+    """Worker process: synthesizes one phrase into the voice bank."""
+    text, lang, bank_dir = job
+    filename = voice_bank_filename(text, lang)
+    path = os.path.join(bank_dir, lang, filename)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = GTTSBackend().synthesize(text, lang)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as clip_file:
+        clip_file.write(data)
+    os.replace(tmp_path, path)
+    return text, filename
+
+def prerender_voice_bank(bank_dir=VOICE_BANK_DIR, locale_code=DEFAULT_LOCALE, jobs=None, force=False):
+    """Renders every phrase the game can speak in one language into the voice bank, in parallel processes."""
+    try:
+        locale = Locale.load(locale_code)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading locale \"{locale_code}\": {e}")
+        return False
+    lang = locale.speech
+    rendered = load_voice_bank_index(bank_dir, lang)
+    phrases = [text for text in locale.all_phrases(ColorCatalog.load().names) if force or text not in rendered]
+    print(f"Rendering {len(phrases)} phrases into \"{bank_dir}\" ({lang})...")
+    failures = 0
+    if phrases:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_prerender_phrase, (text, lang, bank_dir)): text for text in phrases}
+            for future, text in futures.items():
+                try:
+                    text, filename = future.result()
+                    rendered[text] = filename
+                except Exception as e:
+                    failures += 1
+                    print(f"Error rendering \"{text}\": {e}")
+        os.makedirs(os.path.join(bank_dir, lang), exist_ok=True)
+        manifest_path = os.path.join(bank_dir, lang, VOICE_BANK_MANIFEST)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as manifest_file:
+            json.dump(rendered, manifest_file, indent=4, sort_keys=True, ensure_ascii=False)
+        os.replace(manifest_path + ".tmp", manifest_path)
+    print(f"Voice bank has {len(rendered)} phrases, {failures} failed.")
+    return failures == 0
+
+class SpeechService:
+    """Synthesizes speech on a worker pool so the render loop never waits on TTS."""
+    def __init__(self, lang=DEFAULT_LOCALE, workers=SPEECH_WORKERS):
+        self.lang = lang # Language of the requests from now on, see set_lang
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speech")
+        self.in_flight = {} # (lang, text) -> Future, so repeated requests share one synthesis
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.render_wait_max = 0.0 # Longest time the render thread spent handing out ready clips
+        self.busy_total = 0.0 # Seconds workers spent synthesizing and decoding
+
+    def request(self, text):
+        """Returns a Future resolving to a Sound for text, spoken in the current language."""
+        with self.lock:
+            key = (self.lang, text)
+            future = self.in_flight.get(key)
+            if future is None:
+                self.submitted += 1
+                future = self.executor.submit(self._synthesize, text, self.lang, time.perf_counter())
+                self.in_flight[key] = future
+            return future
+
+    def set_lang(self, lang):
+        """Speaks later requests in lang and evicts the decoded clips of the previous language."""
+        with self.lock:
+            old_lang, self.lang = self.lang, lang
+        if old_lang != lang:
+            speech_cache.drop_lang(old_lang)
+
+    def _synthesize(self, text, lang, queued_at):
+        started = time.perf_counter()
         try:
-            sound = pygame.mixer.Sound(filepath)
-            return sound
+            return generate_speech_sound(text, lang)
+        except Exception:
+            with self.lock:
+                self.failed += 1
+            raise
+        finally:
+            finished = time.perf_counter()
+            latency = finished - queued_at
+            with self.lock:
+                self.busy_total += finished - started
+                self.in_flight.pop((lang, text), None)
+                self.completed += 1
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+            try:
+                pygame.event.post(pygame.event.Event(SPEECH_READY_EVENT, text=text))
+            except pygame.error:
+                pass # Display already shut down
+
+    def queue_depth(self):
+        """Number of requests queued or being synthesized."""
+        with self.lock:
+            return self.submitted - self.completed
+
+    def stats(self):
+        with self.lock:
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "queue_depth": self.submitted - self.completed,
+                "latency_avg_ms": round(1000 * self.latency_total / self.completed, 1) if self.completed else 0.0,
+                "latency_max_ms": round(1000 * self.latency_max, 1),
+                "render_wait_max_ms": round(1000 * self.render_wait_max, 3),
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class AudioScheduler:
+    """Plays clips on reserved mixer channels: voice lines one at a time by priority, feedback and clicks at once.
+
+    Voice lines queued before the learner moved on (see advance) are dropped instead of played late.
+    Channels report the end of a clip with an event, so nothing polls the mixer.
+    """
+    VOICE, FEEDBACK, UI = range(3)
+
+    def __init__(self):
+        pygame.mixer.set_reserved(3)
+        self.channels = [pygame.mixer.Channel(i) for i in range(3)]
+        self.channels[self.VOICE].set_endevent(VOICE_END_EVENT)
+        self.channels[self.FEEDBACK].set_endevent(FEEDBACK_END_EVENT)
+        self.voice_queue = [] # Heap of (priority, sequence, generation, kind, future, queued_at)
+        self.sequence = 0
+        self.generation = 0
+        self.voice_playing = None # Generation of the voice line on the channel, None when idle
+        self.feedback_playing = False
+        self.pending_feedback = None # (future, queued_at) waiting for its clip
+        self.latencies = {} # kind -> recent seconds from request to playback
+        self.dropped = {"stale": 0, "superseded": 0, "failed": 0}
+
+    def say(self, future, kind="prompt"):
+        """Queues a voice line; it plays after the lines ahead of it and any feedback being given."""
+        self.sequence += 1
+        heapq.heappush(self.voice_queue, (VOICE_PRIORITIES[kind], self.sequence, self.generation, kind, future, time.perf_counter()))
+        self.pump()
+
+    def feedback(self, future):
+        """Plays right/wrong feedback as soon as it is ready, cutting off the voice line it answers."""
+        if self.pending_feedback is not None:
+            self.dropped["superseded"] += 1
+        self.pending_feedback = (future, time.perf_counter())
+        self.pump()
+
+    def click(self, sound):
+        self.channels[self.UI].play(sound)
+
+    def advance(self):
+        """The learner moved on: voice lines requested so far are stale."""
+        self.generation += 1
+        stale = [entry for entry in self.voice_queue if entry[2] < self.generation]
+        if stale:
+            self.dropped["stale"] += len(stale)
+            self.voice_queue = [entry for entry in self.voice_queue if entry[2] >= self.generation]
+            heapq.heapify(self.voice_queue)
+        if self.voice_playing is not None:
+            self.channels[self.VOICE].stop()
+
+    def handle(self, event):
+        """Consumes the end-of-clip events; returns True if event was one of them."""
+        if event.type == VOICE_END_EVENT:
+            if not self.channels[self.VOICE].get_busy():
+                self.voice_playing = None
+        elif event.type == FEEDBACK_END_EVENT:
+            if not self.channels[self.FEEDBACK].get_busy():
+                self.feedback_playing = False
+        else:
+            return False
+        self.pump()
+        return True
+
+    def pump(self):
+        """Starts whatever can play now."""
+        if self.pending_feedback is not None and self.pending_feedback[0].done():
+            future, queued_at = self.pending_feedback
+            self.pending_feedback = None
+            sound = self._sound(future)
+            if sound is not None:
+                if self.voice_playing is not None:
+                    self.channels[self.VOICE].stop()
+                self.channels[self.FEEDBACK].play(sound)
+                self.feedback_playing = True
+                self._played("feedback", queued_at)
+                tap_latency.reached("audio")
+        while self.voice_queue and self.voice_playing is None and not self.feedback_playing:
+            priority, sequence, generation, kind, future, queued_at = self.voice_queue[0]
+            if not future.done():
+                break # Keep the order; SPEECH_READY_EVENT wakes the loop when the clip is ready
+            heapq.heappop(self.voice_queue)
+            sound = self._sound(future)
+            if sound is not None:
+                self.channels[self.VOICE].play(sound)
+                self.voice_playing = generation
+                self._played(kind, queued_at)
+
+    def _sound(self, future):
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error generating speech: {e}")
+            self.dropped["failed"] += 1
+            return None
+
+    def _played(self, kind, queued_at):
+        samples = self.latencies.get(kind)
+        if samples is None:
+            samples = self.latencies[kind] = deque(maxlen=AUDIO_LATENCY_SAMPLES)
+        samples.append(time.perf_counter() - queued_at)
+
+    def stats(self):
+        latency = {}
+        for kind, samples in self.latencies.items():
+            ordered = sorted(samples)
+            latency[kind] = {"count": len(ordered), "p50_ms": round(1000 * ordered[len(ordered) // 2], 1), "max_ms": round(1000 * ordered[-1], 1)}
+        return {"queue_latency": latency, "dropped": dict(self.dropped), "queued": len(self.voice_queue)}
+
+    def report(self):
+        """Returns queue latency per kind of clip and dropped clip counts as printable lines."""
+        stats = self.stats()
+        lines = [f"{kind:<10} {entry['count']:5d} clips, queue latency p50 {entry['p50_ms']:7.1f} ms, max {entry['max_ms']:7.1f} ms"
+                 for kind, entry in sorted(stats["queue_latency"].items())]
+        lines.append("dropped    " + ", ".join(f"{count} {reason}" for reason, count in stats["dropped"].items()))
+        return lines
+
+def srgb_to_lab(rgb):
+    """Converts an (n, 3) array of 8-bit sRGB values to CIELAB (D65)."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ np.array([[0.4124, 0.2126, 0.0193],
+                             [0.3576, 0.7152, 0.1192],
+                             [0.1805, 0.0722, 0.9505]])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1)
+
+_cKDTree = False # scipy.spatial.cKDTree once kd_tree_type() has looked for it, None without scipy
+
+def kd_tree_type():
+    """Returns scipy's cKDTree, importing it on first use, or None if scipy is not installed."""
+    global _cKDTree
+    if _cKDTree is False:
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            cKDTree = None # Distractor queries fall back to a vectorized scan
+        _cKDTree = cKDTree
+    return _cKDTree
+
+class ColorCatalog:
+    """Playable colors as parallel arrays: names, sRGB, CIELAB and default toggles."""
+    def __init__(self, names, rgb, toggles):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+        self.lab = srgb_to_lab(self.rgb).astype(np.float32)
+        self.toggles = np.asarray(toggles, dtype=bool)
+        tree_type = kd_tree_type() if len(self.names) else None
+        self.tree = tree_type(self.lab) if tree_type is not None else None
+
+    @classmethod
+    def from_entries(cls, entries):
+        return cls([e["name"] for e in entries], [e["rgb"] for e in entries], [e.get("toggle", False) for e in entries])
+
+    @classmethod
+    def load(cls, path=COLOR_CATALOG_FILE):
+        with open(path, "r", encoding="utf-8") as catalog_file:
+            return cls.from_entries(json.load(catalog_file))
+
+    def value(self, i):
+        return tuple(int(v) for v in self.rgb[i])
+
+    def candidates(self, target, high):
+        """Indices whose CIELAB distance to target is at most high, with their distances."""
+        if self.tree is None:
+            indices = np.arange(len(self.names))
+        elif np.isfinite(high):
+            indices = np.asarray(self.tree.query_ball_point(self.lab[target], high), dtype=np.intp)
+        else:
+            # Open-ended: every color, nearest first, with the distances the tree already has
+            distances, indices = self.tree.query(self.lab[target], k=[*range(1, len(self.names) + 1)])
+            return np.asarray(indices, dtype=np.intp), np.asarray(distances)
+        return indices, np.linalg.norm(self.lab[indices] - self.lab[target], axis=1)
+
+    def distractors(self, target, k, delta_e, mask, rng):
+        """Picks k indices from mask, other than target, within the delta_e range of target.
+
+        When the range holds fewer than k allowed colors, the rest are the allowed colors
+        closest to the range.
+        """
+        low, high = delta_e
+        indices, distances = self.candidates(target, high)
+        allowed = mask[indices] & (indices != target)
+        in_range = allowed & (distances >= low) & (distances <= high)
+        picked = indices[in_range]
+        if len(picked) >= k:
+            return rng.choice(picked, k, replace=False)
+        # Not enough in range: widen to every allowed color, nearest to the range first
+        indices, distances = self.candidates(target, float("inf"))
+        allowed = mask[indices] & (indices != target) & ~np.isin(indices, picked)
+        rest = indices[allowed]
+        gap = np.maximum(low - distances[allowed], distances[allowed] - high)
+        return np.concatenate([picked, rest[np.argsort(gap, kind="stable")[:k - len(picked)]]])
+
+LEITNER_BOXES = 5 # Box 0 holds the pairs most in need of practice
+LEITNER_WEIGHTS = 2.0 ** -np.arange(LEITNER_BOXES) # Draw weight per box
+CONFUSION_WEIGHT = 4.0 # Extra weight of a pair whose distractor is tapped every time its target is asked
+
+class AdaptiveTutor:
+    """Confusion matrix and Leitner boxes over (target, distractor) pairs for one learner; both weight the draws.
+
+    Each tap updates a fixed number of cells, and picking a question only looks at the
+    toggled colors, so neither cost grows with the learner's history.
+    """
+    def __init__(self, size):
+        self.confusion = np.zeros((size, size), dtype=np.int32) # [target, tapped] counts
+        self.boxes = np.zeros((size, size), dtype=np.int8) # Leitner box of each (target, distractor) pair
+
+    def record(self, target, tapped, shown, first_try):
+        """Updates the learner model after a tap on square tapped while target was asked."""
+        self.confusion[target, tapped] += 1
+        if tapped != target:
+            # Confused pair goes back to the first box
+            self.boxes[target, tapped] = 0
+        elif first_try:
+            # Every pair shown in a cleanly answered question moves up a box
+            others = [i for i in shown if i != target]
+            self.boxes[target, others] = np.minimum(self.boxes[target, others] + 1, LEITNER_BOXES - 1)
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, confusion=self.confusion, boxes=self.boxes)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data, size):
+        """Restores a saved tutor, or starts a fresh one if the catalog size changed."""
+        tutor = cls(size)
+        if data:
+            saved = np.load(io.BytesIO(data))
+            if saved["confusion"].shape == tutor.confusion.shape:
+                tutor.confusion = saved["confusion"]
+                tutor.boxes = saved["boxes"]
+        return tutor
+
+    def pair_weights(self, pool):
+        """Draw weights of the (target, distractor) pairs within pool: the Leitner box weight, raised by the confusion rate."""
+        asked = np.maximum(self.confusion[pool].sum(axis=1, keepdims=True), 1)
+        rates = self.confusion[np.ix_(pool, pool)] / asked # Share of the taps on each target that went to the distractor
+        weights = LEITNER_WEIGHTS[self.boxes[np.ix_(pool, pool)]] * (1.0 + CONFUSION_WEIGHT * rates)
+        np.fill_diagonal(weights, 0.0)
+        return weights
+
+    def target_weights(self, pool):
+        """Draw probabilities of the targets in pool, by the total weight of their pairs; None for uniform."""
+        totals = self.pair_weights(pool).sum(axis=1)
+        return totals / totals.sum() if totals.sum() > 0 else None
+
+    def pick(self, target, k, mask, rng):
+        """Draws k distractors for target from mask, weighted by pair_weights."""
+        pool = np.flatnonzero(mask)
+        weights = self.pair_weights(pool)
+        row = int(np.searchsorted(pool, target))
+        if k == 0 or len(pool) == 1:
+            return pool[:0] # A single square needs no distractors
+        row_weights = weights[row]
+        if row_weights.sum() <= 0:
+            row_weights = np.ones(len(pool))
+            row_weights[row] = 0.0
+        return rng.choice(pool, k, replace=False, p=row_weights / row_weights.sum())
+
+def deal_targets(candidates, count, rng, weights=None):
+    """Orders count targets so every candidate comes up equally often, give or take one, and never twice in a row.
+
+    Each pass holds every candidate once; weights (probabilities, all above zero) decide how early
+    a candidate comes in its pass, and so which ones fill a round shorter than a pass.
+    """
+    targets = []
+    while len(targets) < count:
+        deal = [int(i) for i in rng.choice(candidates, len(candidates), replace=False, p=weights)]
+        if targets and len(deal) > 1 and deal[0] == targets[-1]:
+            # The new pass may not open with the color that closed the last one
+            swap = int(rng.integers(1, len(deal)))
+            deal[0], deal[swap] = deal[swap], deal[0]
+        targets.extend(deal)
+    return targets[:count]
+
+class QuestionDeck:
+    """The questions of one round, built by a generator and kept lookahead questions ahead of the screen.
+
+    take() only hands over a question that is already built; refill() builds the next ones
+    once the frame is on screen.
+    """
+    def __init__(self, questions, lookahead=QUESTION_LOOKAHEAD):
+        self.questions = questions # Generator of built questions
+        self.lookahead = lookahead
+        self.ready = deque()
+        self.built = 0
+        self.misses = 0 # Questions that had to be built on the spot
+        self.swaps = deque(maxlen=QUESTION_SWAP_SAMPLES) # Seconds per take()
+
+    def refill(self):
+        """Builds questions until lookahead of them are ready or the round has no more."""
+        while len(self.ready) < self.lookahead:
+            question = next(self.questions, None)
+            if question is None:
+                return
+            self.ready.append(question)
+            self.built += 1
+
+    def take(self):
+        """Returns the next question, or None at the end of the round."""
+        started = time.perf_counter()
+        if not self.ready:
+            self.misses += 1
+            question = next(self.questions, None)
+            self.built += question is not None
+        else:
+            question = self.ready.popleft()
+        self.swaps.append(time.perf_counter() - started)
+        return question
+
+    def stats(self):
+        swaps = sorted(self.swaps)
+        return {
+            "built": self.built,
+            "misses": self.misses,
+            "swap_us_p50": round(1e6 * swaps[len(swaps) // 2], 1) if swaps else None,
+            "swap_us_max": round(1e6 * swaps[-1], 1) if swaps else None,
+        }
+
+class AnswerLog:
+    """Append-only JSON lines log of taps, written in batches by a background thread.
+
+    Files are named answers-YYYYMMDD-NNN.jsonl and rotate when the day changes or a file
+    grows past max_bytes.
+    """
+    def __init__(self, log_dir=ANSWER_LOG_DIR, max_bytes=ANSWER_LOG_MAX_BYTES, fsync_seconds=ANSWER_LOG_FSYNC_SECONDS):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.fsync_seconds = fsync_seconds
+        self.device = socket.gethostname()
+        self.queue = queue.SimpleQueue()
+        self.file = None
+        self.day = None
+        self.written = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="answer-log", daemon=True)
+        self.thread.start()
+
+    def append(self, record):
+        """Queues one record; never touches the disk on the calling thread."""
+        record.setdefault("time", round(time.time(), 3))
+        record.setdefault("device", self.device)
+        self.queue.put(record)
+
+    def close(self):
+        """Flushes every queued record and stops the writer."""
+        self.queue.put(None)
+        self.thread.join(timeout=5)
+
+    def _run(self):
+        last_sync = time.monotonic()
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=self.fsync_seconds)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < ANSWER_LOG_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [record for record in batch if record is not None]
+            try:
+                if batch:
+                    self._write(batch)
+                if self.file is not None and (not running or time.monotonic() - last_sync >= self.fsync_seconds):
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+                    last_sync = time.monotonic()
+            except OSError as e:
+                self.dropped += len(batch)
+                print(f"Error writing answer log: {e}")
+        if self.file is not None:
+            self.file.close()
+
+    def _write(self, batch):
+        day = time.strftime("%Y%m%d")
+        if self.file is None or day != self.day or self.file.tell() >= self.max_bytes:
+            self._rotate(day)
+        self.file.write("".join(json.dumps(record) + "\n" for record in batch))
+        self.written += len(batch)
+
+    def _rotate(self, day):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+        os.makedirs(self.log_dir, exist_ok=True)
+        sequence = 0
+        while True:
+            path = os.path.join(self.log_dir, f"answers-{day}-{sequence:03d}.jsonl")
+            if not os.path.exists(path) or os.path.getsize(path) < self.max_bytes:
+                break
+            sequence += 1
+        self.file = open(path, "a", encoding="utf-8")
+        self.day = day
+
+class SyncClient:
+    """Pushes answers and profile changes to the classroom server from a background thread.
+
+    Batches are appended to an outbox file before they are sent and only dropped from it once
+    the server acknowledges them, so a station that goes offline replays them when it is back.
+    """
+    def __init__(self, address, station=None, outbox_path=SYNC_OUTBOX):
+        host, _, port = address.partition(":")
+        self.address = (host or "127.0.0.1", int(port or SYNC_PORT))
+        self.station = station or socket.gethostname()
+        self.outbox_path = outbox_path
+        self.queue = queue.SimpleQueue()
+        self.pending = deque(self._read_outbox()) # Batches waiting for an acknowledgement
+        self.connection = None
+        self.connected = False
+        self.sent = 0
+        self.acknowledged = 0
+        self.reconnects = 0
+        self.close_deadline = None
+        self.thread = threading.Thread(target=self._run, name="sync", daemon=True)
+        self.thread.start()
+
+    def send(self, kind, record):
+        """Queues one record; never blocks the calling thread on the network or disk."""
+        self.queue.put(dict(record, kind=kind))
+
+    def close(self, timeout=5):
+        """Keeps trying to deliver for up to timeout seconds, leaving the rest in the outbox for next time."""
+        self.close_deadline = time.monotonic() + timeout
+        self.queue.put(None)
+        self.thread.join(timeout=timeout + 1)
+
+    def stats(self):
+        return {"connected": self.connected, "pending_batches": len(self.pending), "sent": self.sent,
+                "acknowledged": self.acknowledged, "reconnects": self.reconnects}
+
+    def _read_outbox(self):
+        try:
+            with open(self.outbox_path, encoding="utf-8") as outbox:
+                return [json.loads(line) for line in outbox if line.strip()]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"Error reading sync outbox: {e}")
+            return []
+
+    def _run(self):
+        retry_at = 0.0
+        backoff = SYNC_RETRY_SECONDS[0]
+        running = True
+        while running or self.pending:
+            now = time.monotonic()
+            if running:
+                wait = min(SYNC_FLUSH_SECONDS, max(0.0, retry_at - now)) if self.pending else SYNC_FLUSH_SECONDS
+                running = self._collect_batch(wait)
+            elif now >= self.close_deadline:
+                break # The outbox keeps the rest
+            elif now < retry_at:
+                time.sleep(min(retry_at, self.close_deadline) - now)
+                continue
+            if not self.pending or time.monotonic() < retry_at:
+                continue
+            try:
+                self._deliver()
+                backoff = SYNC_RETRY_SECONDS[0]
+            except (OSError, ValueError) as e:
+                if self.connected:
+                    print(f"Error syncing with classroom server: {e}")
+                self._disconnect()
+                retry_at = time.monotonic() + backoff
+                backoff = min(backoff * 2, SYNC_RETRY_SECONDS[1])
+        self._disconnect()
+
+    def _collect_batch(self, wait):
+        """Moves records queued within wait seconds into a new outbox batch; returns False once close() was called."""
+        records = []
+        deadline = time.monotonic() + wait
+        running = True
+        while len(records) < SYNC_BATCH:
+            try:
+                record = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if record is None:
+                running = False
+                break
+            records.append(record)
+        if records:
+            batch = {"station": self.station, "batch": uuid.uuid4().hex, "records": records}
+            try:
+                with open(self.outbox_path, "a", encoding="utf-8") as outbox:
+                    outbox.write(json.dumps(batch) + "\n")
+            except OSError as e:
+                print(f"Error writing sync outbox: {e}")
+            self.pending.append(batch)
+        return running
+
+    def _deliver(self):
+        """Sends pending batches one at a time, each after the previous one was acknowledged."""
+        if self.connection is None:
+            self.connection = socket.create_connection(self.address, timeout=10)
+            self.reader = self.connection.makefile("r", encoding="utf-8")
+            self.connected = True
+            self.reconnects += 1
+        while self.pending:
+            batch = self.pending[0]
+            self.connection.sendall((json.dumps(batch) + "\n").encode("utf-8"))
+            self.sent += 1
+            reply = json.loads(self.reader.readline() or "null")
+            if not reply or reply.get("ack") != batch["batch"]:
+                raise ValueError(f"unexpected reply {reply!r}")
+            self.pending.popleft()
+            self.acknowledged += 1
+            if not self.queue.empty():
+                break # Let new records join the outbox before continuing
+        # Acknowledged batches leave the outbox; written aside and swapped in, so a crash keeps the old outbox
+        try:
+            tmp_path = self.outbox_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as outbox:
+                outbox.write("".join(json.dumps(batch) + "\n" for batch in self.pending))
+                outbox.flush()
+                os.fsync(outbox.fileno())
+            os.replace(tmp_path, self.outbox_path)
+        except OSError as e:
+            print(f"Error rewriting sync outbox: {e}")
+
+    def _disconnect(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        self.connected = False
+
+class ProfileStore:
+    """Learner profiles and their settings in SQLite, in WAL mode so saves never block reads."""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS learners (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            learner_id INTEGER PRIMARY KEY REFERENCES learners(id),
+            num_choices INTEGER NOT NULL,
+            force_color TEXT,
+            difficulty TEXT NOT NULL,
+            toggles TEXT NOT NULL,
+            tutor BLOB,
+            language TEXT
+        );
+    """
+    MIGRATIONS = {"language": "ALTER TABLE settings ADD COLUMN language TEXT"} # Columns added since the first schema
+    # Constant statements, so sqlite3's statement cache reuses the compiled forms
+    SELECT_NAMES = "SELECT name FROM learners ORDER BY name"
+    SELECT_PROFILE = ("SELECT s.num_choices, s.force_color, s.difficulty, s.toggles, s.tutor, s.language "
+                      "FROM learners l JOIN settings s ON s.learner_id = l.id WHERE l.name = ?")
+    INSERT_LEARNER = "INSERT OR IGNORE INTO learners (name) VALUES (?)"
+    UPSERT_SETTINGS = ("INSERT INTO settings (learner_id, num_choices, force_color, difficulty, toggles, language) "
+                       "SELECT id, ?, ?, ?, ?, ? FROM learners WHERE name = ? "
+                       "ON CONFLICT(learner_id) DO UPDATE SET num_choices = excluded.num_choices, "
+                       "force_color = excluded.force_color, difficulty = excluded.difficulty, toggles = excluded.toggles, "
+                       "language = excluded.language")
+    UPDATE_TUTOR = "UPDATE settings SET tutor = ? WHERE learner_id = (SELECT id FROM learners WHERE name = ?)"
+
+    def __init__(self, path=PROFILE_DB_PATH):
+        # Transactions are explicit; the store is opened by the loader thread and then used by the game loop
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(self.SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(settings)")}
+        for column, statement in self.MIGRATIONS.items():
+            if column not in columns:
+                self.db.execute(statement)
+
+    def names(self):
+        return [row[0] for row in self.db.execute(self.SELECT_NAMES)]
+
+    def add(self, name):
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute(self.INSERT_LEARNER, (name,))
+
+    def load(self, name):
+        """Returns the saved settings of a learner as a dict, or None if nothing was saved yet."""
+        row = self.db.execute(self.SELECT_PROFILE, (name,)).fetchone()
+        if row is None:
+            return None
+        num_choices, force_color, difficulty, toggles, tutor, language = row
+        return {"num_choices": num_choices, "force_color": force_color, "difficulty": difficulty,
+                "toggles": json.loads(toggles), "tutor": tutor, "language": language}
+
+    def save(self, name, settings=None, tutor=None):
+        """Writes settings and/or the serialized tutor of a learner in one transaction."""
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute(self.INSERT_LEARNER, (name,))
+            if settings is not None:
+                self.db.execute(self.UPSERT_SETTINGS, (settings["num_choices"], settings["force_color"],
+                                                       settings["difficulty"], json.dumps(settings["toggles"]),
+                                                       settings.get("language"), name))
+            if tutor is not None:
+                self.db.execute(self.UPDATE_TUTOR, (tutor, name))
+
+    def close(self):
+        self.db.close()
+
+class AssetPack:
+    """Read-only view of a packed asset file, memory-mapped so only the entries used are paged in.
+
+    Layout: ASSET_PACK_MAGIC, the length of the index as a little-endian u32, the JSON index
+    {name: {"kind", "codec", "offset", "length"[, "size"]}}, then the payloads.
+    """
+    def __init__(self, path=ASSET_PACK):
+        self.path = path
+        with open(path, "rb") as pack_file:
+            self.map = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(ASSET_PACK_MAGIC)] != ASSET_PACK_MAGIC:
+            raise ValueError(f"{path} is not an asset pack")
+        start = len(ASSET_PACK_MAGIC) + 4
+        (index_length,) = struct.unpack_from("<I", self.map, len(ASSET_PACK_MAGIC))
+        self.index = json.loads(self.map[start:start + index_length])
+        self.base = start + index_length
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def payload(self, name):
+        """Returns the decompressed payload of one entry."""
+        entry = self.index[name]
+        data = self.map[self.base + entry["offset"]:self.base + entry["offset"] + entry["length"]]
+        return zlib.decompress(data) if entry["codec"] in ("zlib", "rgba-zlib") else data
+
+    def sound(self, name):
+        try:
+            return pygame.mixer.Sound(file=io.BytesIO(self.payload(name)))
         except pygame.error as e:
             print(f"Error loading sound: {e}")
             return None
+
+    def image(self, name):
+        entry = self.index[name]
+        # "size" is the layout size at ATLAS_REFERENCE_HEIGHT; packs without "pixels" were stored at it
+        return pygame.image.fromstring(self.payload(name), tuple(entry.get("pixels", entry["size"])), "RGBA")
+
+    def close(self):
+        self.map.close()
+
+def _encode_ogg(path):
+    """Returns path encoded as Ogg Vorbis, or None if no encoder is installed."""
+    if shutil.which("oggenc"):
+        command = ["oggenc", "-Q", "-q", str(ASSET_PACK_OGG_QUALITY), "-o", "-", path]
+    elif shutil.which("ffmpeg"):
+        command = ["ffmpeg", "-loglevel", "error", "-i", path, "-c:a", "libvorbis", "-q:a", str(ASSET_PACK_OGG_QUALITY), "-f", "ogg", "-"]
     else:
-        print(f"Sound file, {filepath} doesn't exists, generating...")
-        tts = gTTS(text=text, lang='en')
-        tts.save(filepath)
-        pygame.time.wait(500)
-        sound = pygame.mixer.Sound(filepath)
-        return sound
+        return None
+    try:
+        return subprocess.run(command, check=True, capture_output=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error encoding {path}: {e}")
+        return None
+
+def build_asset_pack(manifest_path=ASSET_MANIFEST, pack_path=ASSET_PACK, codec="auto"):
+    """Packs every asset in the manifest into one file; returns True on success.
+
+    Sounds are stored as Ogg Vorbis (codec "ogg", or "auto" with oggenc or ffmpeg installed) or
+    as zlib-compressed WAV. Images are stored as zlib-compressed RGBA at their source resolution;
+    ImageAtlas scales them for the actual display.
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError) as e:
+        print(f"Error loading asset manifest: {e}")
+        return False
+    index = {}
+    payloads = []
+    offset = loose_bytes = 0
+
+    def add(name, entry, data):
+        nonlocal offset
+        entry.update(offset=offset, length=len(data))
+        index[name] = entry
+        payloads.append(data)
+        offset += len(data)
+
+    try:
+        for name, path in manifest.get("sounds", {}).items():
+            loose_bytes += os.path.getsize(path)
+            encoded = _encode_ogg(path) if codec in ("auto", "ogg") else None
+            if encoded is None and codec == "ogg":
+                print("Error: no Ogg Vorbis encoder (oggenc or ffmpeg) found")
+                return False
+            if encoded is not None:
+                add(name, {"kind": "sound", "codec": "ogg"}, encoded)
+            else:
+                with open(path, "rb") as sound_file:
+                    add(name, {"kind": "sound", "codec": "zlib"}, zlib.compress(sound_file.read(), 9))
+        for name, entry in manifest.get("images", {}).items():
+            loose_bytes += os.path.getsize(entry["file"])
+            image = pygame.image.load(entry["file"])
+            rgba = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+            rgba.blit(image, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            add(name, {"kind": "image", "codec": "rgba-zlib", "size": list(entry.get("size", image.get_size())), "pixels": list(image.get_size())},
+                zlib.compress(pygame.image.tostring(rgba, "RGBA"), 9))
+    except (OSError, pygame.error) as e:
+        print(f"Error packing assets: {e}")
+        return False
+
+    header = json.dumps(index).encode("utf-8")
+    tmp_path = pack_path + ".tmp"
+    with open(tmp_path, "wb") as pack_file:
+        pack_file.write(ASSET_PACK_MAGIC + struct.pack("<I", len(header)) + header)
+        for data in payloads:
+            pack_file.write(data)
+    os.replace(tmp_path, pack_path)
+    print(f"Packed {len(index)} assets from {loose_bytes / 1024:.0f} KB of loose files into {os.path.getsize(pack_path) / 1024:.0f} KB at \"{pack_path}\"")
+    return True
+
+class ImageAtlas:
+    """UI images smoothscaled for the screen size and packed into one surface in the display format.
+
+    The scaled atlas is kept for every screen size seen, so going back to a size only converts
+    the cached variant to the new display surface.
+    """
+    def __init__(self, entries, timings, load):
+        self.entries = entries # name -> {"size": [w, h] at ATLAS_REFERENCE_HEIGHT, ...}
+        self.timings = timings
+        self.load = load # name -> Surface
+        self.sources = {} # name -> 32-bit Surface as loaded from disk
+        self.variants = {} # screen size -> (scaled atlas Surface, {name: Rect})
+        self.screen = None
+        self.images = None # name -> subsurface of the converted atlas, None until the next get
+        self.lock = threading.Lock()
+
+    def set_display(self, screen):
+        """Re-targets the atlas to a display surface returned by set_mode."""
+        with self.lock:
+            self.screen = screen
+            self.images = None
+
+    def invalidate(self, names, entries):
+        """Drops the sources of names and every scaled variant; the next get rebuilds the atlas from entries."""
+        with self.lock:
+            self.entries = entries
+            for name in names:
+                self.sources.pop(name, None)
+            self.variants.clear()
+            self.images = None
+
+    def get(self, name):
+        images = self.images
+        if images is None:
+            with self.lock:
+                if self.images is None:
+                    self.images = self._convert()
+                images = self.images
+        return images.get(name)
+
+    def _convert(self):
+        size = self.screen.get_size() if self.screen is not None else FULLSCREEN_RESOLUTION
+        variant = self.variants.get(size)
+        if variant is None:
+            started = time.perf_counter()
+            variant = self.variants[size] = self._build(size[1] / ATLAS_REFERENCE_HEIGHT)
+            self.timings[f"atlas {size[0]}x{size[1]}"] = time.perf_counter() - started
+        atlas, rects = variant
+        # Subsurfaces share the converted pixels, so blitting a face is a same-format copy
+        atlas = atlas.convert_alpha()
+        return {name: atlas.subsurface(rect) for name, rect in rects.items()}
+
+    def _source(self, name):
+        if name not in self.sources:
+            try:
+                self.sources[name] = self.load(name).convert_alpha()
+            except (pygame.error, FileNotFoundError) as e:
+                print(f"Error loading image: {e}")
+                self.sources[name] = None
+        return self.sources[name]
+
+    def _build(self, scale):
+        """Smoothscales every image and packs them in rows."""
+        scaled = {}
+        for name, entry in self.entries.items():
+            source = self._source(name)
+            if source is None:
+                continue
+            width, height = entry.get("size", source.get_size())
+            scaled[name] = pygame.transform.smoothscale(source, (max(1, round(width * scale)), max(1, round(height * scale))))
+        rects = {}
+        x = y = row_height = atlas_width = 0
+        for name, image in sorted(scaled.items(), key=lambda item: -item[1].get_height()):
+            if x and x + image.get_width() > ATLAS_MAX_WIDTH:
+                x, y, row_height = 0, y + row_height, 0
+            rects[name] = pygame.Rect((x, y), image.get_size())
+            x += image.get_width()
+            row_height = max(row_height, image.get_height())
+            atlas_width = max(atlas_width, x)
+        atlas = pygame.Surface((max(1, atlas_width), max(1, y + row_height)), pygame.SRCALPHA)
+        atlas.fill((0, 0, 0, 0))
+        for name, rect in rects.items():
+            # RGBA_MAX onto transparent black copies the pixels as they are instead of blending them
+            atlas.blit(scaled[name], rect, special_flags=pygame.BLEND_RGBA_MAX)
+        return atlas, rects
+
+class AssetRegistry:
+    """Loads the sounds and images of the asset pack, or of the manifest's loose files, on first use."""
+    def __init__(self, manifest_path=ASSET_MANIFEST, pack_path=ASSET_PACK):
+        self.manifest_path = manifest_path
+        self.pack = None
+        if pack_path and os.path.exists(pack_path):
+            try:
+                self.pack = AssetPack(pack_path)
+            except (OSError, ValueError) as e:
+                print(f"Error opening asset pack: {e}")
+        if self.pack is not None:
+            self.sounds, self.images = self._pack_entries(self.pack)
+        else:
+            self.sounds, self.images = self._manifest_entries() or ({}, {})
+        self.loaded = {} # name -> Sound or Surface
+        self.timings = {} # name -> seconds spent loading, in load order
+        self.lock = threading.Lock()
+        self.atlas = ImageAtlas(self.images, self.timings, self._load_image)
+
+    @staticmethod
+    def _pack_entries(pack):
+        sounds = {name: entry for name, entry in pack.index.items() if entry["kind"] == "sound"}
+        images = {name: entry for name, entry in pack.index.items() if entry["kind"] == "image"}
+        return sounds, images
+
+    def _manifest_entries(self):
+        """Returns the sounds and images of the manifest, or None if it cannot be read."""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError) as e:
+            print(f"Error loading asset manifest: {e}")
+            return None
+        return manifest.get("sounds", {}), manifest.get("images", {})
+
+    def watched_paths(self):
+        """Files whose changes reload() applies: the pack, or else the manifest and the files it lists."""
+        if self.pack is not None:
+            return [self.pack.path]
+        return [self.manifest_path] + list(self.sounds.values()) + [entry["file"] for entry in self.images.values()]
+
+    def reload(self, paths):
+        """Drops the assets stored in the changed files so their next use loads them again; returns their names."""
+        paths = set(paths)
+        old_pack = None
+        sounds, images = self.sounds, self.images
+        if self.pack is not None:
+            if self.pack.path not in paths:
+                return set()
+            try:
+                pack = AssetPack(self.pack.path)
+            except (OSError, ValueError) as e:
+                print(f"Error reopening asset pack: {e}")
+                return set()
+            old_pack = self.pack
+            sounds, images = self._pack_entries(pack)
+            changed = set(self.sounds) | set(self.images) | set(pack.index)
+        else:
+            changed = {name for name, path in sounds.items() if path in paths}
+            changed |= {name for name, entry in images.items() if entry["file"] in paths}
+            if self.manifest_path in paths:
+                sounds, images = self._manifest_entries() or (sounds, images)
+                changed |= {name for name in set(self.sounds) | set(sounds) if self.sounds.get(name) != sounds.get(name)}
+                changed |= {name for name in set(self.images) | set(images) if self.images.get(name) != images.get(name)}
+        changed_images = {name for name in changed if name in self.images or name in images}
+        with self.lock:
+            if old_pack is not None:
+                self.pack = pack
+            self.sounds, self.images = sounds, images
+            for name in changed:
+                self.loaded.pop(name, None)
+            if changed_images:
+                self.atlas.invalidate(changed_images, images)
+            if old_pack is not None:
+                old_pack.close() # Loaded assets are copies, nothing points into the old map
+        return changed
+
+    def sound(self, name):
+        """Returns the Sound called name, loading it on first use."""
+        return self.get(name)
+
+    def image(self, name):
+        """Returns the Surface called name from the atlas of the current display."""
+        return self.atlas.get(name)
+
+    def set_display(self, screen):
+        self.atlas.set_display(screen)
+
+    def get(self, name):
+        if name in self.images:
+            return self.atlas.get(name)
+        asset = self.loaded.get(name)
+        if asset is not None:
+            return asset
+        with self.lock:
+            if name not in self.loaded:
+                started = time.perf_counter()
+                self.loaded[name] = self._load(name)
+                self.timings[name] = time.perf_counter() - started
+            return self.loaded[name]
+
+    def _load(self, name):
+        if name in self.sounds:
+            return self.pack.sound(name) if self.pack is not None else load_sound(self.sounds[name])
+        print(f"Asset \"{name}\" is not in the manifest")
+        return None
+
+    def _load_image(self, name):
+        if self.pack is not None:
+            return self.pack.image(name)
+        return pygame.image.load(self.images[name]["file"])
+
+    def warm_up(self, names):
+        """Loads names on a background thread so their first use is instant."""
+        thread = threading.Thread(target=lambda: [self.get(name) for name in names], name="asset-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self, keep):
+        """Drops every loaded asset not named in keep."""
+        with self.lock:
+            for name in [n for n in self.loaded if n not in keep]:
+                del self.loaded[name]
+
+    def report(self):
+        """Returns per-asset load times as printable lines, in load order."""
+        lines = [f"{name:<16} {seconds * 1000:8.2f} ms" for name, seconds in self.timings.items()]
+        lines.append(f"{'total':<16} {sum(self.timings.values()) * 1000:8.2f} ms for {len(self.timings)} assets")
+        return lines
+
+class TextRenderCache:
+    """Bounded LRU cache of rendered text surfaces, so unchanged labels are rasterized once."""
+    def __init__(self, max_entries=TEXT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict() # (font, text, antialias, color) -> Surface
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock() # The loader may clear the cache while the menu draws
+
+    def lookup(self, key, render):
+        with self.lock:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.surfaces.move_to_end(key)
+                self.hits += 1
+                return surface
+            self.misses += 1
+            surface = render()
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+            return surface
+
+    def render(self, font, text, antialias, color):
+        """Cached equivalent of font.render(text, antialias, color)."""
+        if isinstance(color, pygame.Color):
+            color = tuple(color) # pygame.Color is not hashable
+        return self.lookup((font, text, antialias, color), lambda: font.render(text, antialias, color))
+
+    def render_wrapped(self, text, font, color, max_width):
+        """Cached equivalent of render_text_wrapped."""
+        if isinstance(color, pygame.Color):
+            color = tuple(color)
+        return self.lookup((font, text, "wrapped", color, max_width), lambda: _render_text_wrapped(text, font, color, max_width))
+
+    def clear(self):
+        with self.lock:
+            self.surfaces.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.surfaces)}
+
+text_cache = TextRenderCache()
 
 def render_text_wrapped(text, font, color, max_width):
+    """Renders text wrapped to a given width."""
+    return text_cache.render_wrapped(text, font, color, max_width)
+
+def _render_text_wrapped(text, font, color, max_width):
     """Renders text wrapped to a given width."""
     words = text.split(' ')
     lines = []
@@ -120,6 +1540,500 @@ def render_text_wrapped(text, font, color, max_width):
 
     return combined_surface
 
+class _PhaseTimer:
+    """Reusable context manager adding elapsed time to one profiler phase."""
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.current[self.name] += time.perf_counter() - self.started
+
+class _NullTimer:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+class _StageTimer:
+    def __init__(self, timeline, name):
+        self.timeline = timeline
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timeline.record(self.name, self.started, time.perf_counter())
+
+class StartupTimeline:
+    """Start and end of every startup stage, on any thread, relative to STARTED_AT."""
+    def __init__(self, origin=STARTED_AT):
+        self.origin = origin
+        self.stages = [] # (name, thread name, start, end) in perf_counter seconds
+        self.first_frame_at = None
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def record(self, name, started, ended):
+        with self.lock:
+            self.stages.append((name, threading.current_thread().name, started, ended))
+
+    def frame_shown(self):
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+            self.record("first frame", self.first_frame_at, self.first_frame_at)
+
+    def stats(self):
+        with self.lock:
+            stages = sorted(self.stages, key=lambda stage: stage[2])
+        return [{"stage": name, "thread": thread, "start_ms": round(1000 * (start - self.origin), 1),
+                 "end_ms": round(1000 * (end - self.origin), 1)} for name, thread, start, end in stages]
+
+    def report(self):
+        """Returns the timeline as printable lines, in start order."""
+        lines = [f"{'start':>9} {'end':>9} {'took':>8}  {'thread':<14} stage"]
+        for stage in self.stats():
+            lines.append(f"{stage['start_ms']:7.1f}ms {stage['end_ms']:7.1f}ms {stage['end_ms'] - stage['start_ms']:6.1f}ms  {stage['thread']:<14} {stage['stage']}")
+        return lines
+
+startup = StartupTimeline()
+
+_sdl = False # pygame's SDL library once sdl_library() has looked for it, None where it cannot be found
+
+def sdl_library():
+    """Returns pygame's SDL library through ctypes, loading it on first use, or None where it cannot be found."""
+    global _sdl
+    if _sdl is False:
+        _sdl = None
+        base = os.path.dirname(pygame.__file__)
+        paths = sorted(glob.glob(os.path.join(base, "*SDL2*")) + glob.glob(os.path.join(base + ".libs", "*SDL2*"))
+                       + glob.glob(os.path.join(base, ".dylibs", "*SDL2*")))
+        system = ctypes.util.find_library("SDL2")
+        for path in paths + ([system] if system else []):
+            try:
+                library = ctypes.CDLL(path)
+            except OSError:
+                continue
+            if hasattr(library, "SDL_GetTouchDeviceType") and hasattr(library, "SDL_AddEventWatch"):
+                _sdl = library
+                break
+    return _sdl
+
+class SDLTouchFingerEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_uint32), ("timestamp", ctypes.c_uint32), ("touchId", ctypes.c_int64), ("fingerId", ctypes.c_int64)]
+
+class SDLMouseButtonEvent(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_uint32), ("timestamp", ctypes.c_uint32), ("windowID", ctypes.c_uint32), ("which", ctypes.c_uint32),
+                ("button", ctypes.c_uint8), ("state", ctypes.c_uint8), ("clicks", ctypes.c_uint8), ("padding1", ctypes.c_uint8),
+                ("x", ctypes.c_int32), ("y", ctypes.c_int32)]
+
+SDL_EVENT_FILTER = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+class TouchInput:
+    """Which touch devices are touchscreens, and when SDL queued each tap, read from pygame's SDL library.
+
+    pygame passes on neither SDL's touch device types nor its event timestamps, so an SDL event watch
+    stamps taps as they are queued. Without the library fingers are left to SDL's mouse emulation and
+    taps are timed from when the game read them.
+    """
+    def __init__(self):
+        self.sdl = None
+        self.watch = None # The ctypes callback SDL holds, kept alive while installed
+        self.lock = threading.Lock() # SDL calls the watch on whichever thread queues an event
+        self.stamps = OrderedDict() # (event type, device, button or finger, ...) -> perf_counter when queued
+        self.direct = {} # touch id -> whether it is a touchscreen
+
+    @property
+    def active(self):
+        return self.sdl is not None
+
+    def install(self):
+        """Starts stamping taps; returns False where SDL cannot be reached."""
+        sdl = sdl_library()
+        if sdl is None or self.sdl is not None:
+            return self.sdl is not None
+        sdl.SDL_GetTouchDeviceType.argtypes = [ctypes.c_int64]
+        sdl.SDL_GetTouchDeviceType.restype = ctypes.c_int
+        sdl.SDL_AddEventWatch.argtypes = sdl.SDL_DelEventWatch.argtypes = [SDL_EVENT_FILTER, ctypes.c_void_p]
+        self.watch = SDL_EVENT_FILTER(self._queued)
+        sdl.SDL_AddEventWatch(self.watch, None)
+        self.sdl = sdl
+        return True
+
+    def close(self):
+        if self.sdl is not None:
+            self.sdl.SDL_DelEventWatch(self.watch, None)
+            self.sdl = self.watch = None
+        self.stamps.clear()
+        self.direct.clear()
+
+    def _queued(self, userdata, event):
+        kind = ctypes.c_uint32.from_address(event).value
+        if kind == pygame.FINGERDOWN:
+            finger = SDLTouchFingerEvent.from_address(event)
+            key = (kind, finger.touchId, finger.fingerId)
+        elif kind == pygame.MOUSEBUTTONDOWN:
+            button = SDLMouseButtonEvent.from_address(event)
+            key = (kind, button.button, button.x, button.y)
+        else:
+            return 1
+        with self.lock:
+            self.stamps[key] = time.perf_counter()
+            while len(self.stamps) > TAP_STAMPS:
+                self.stamps.popitem(last=False)
+        return 1
+
+    def is_direct(self, touch_id):
+        """Whether a touch device is a touchscreen, whose fingers land where they touch."""
+        if self.sdl is None:
+            return False
+        direct = self.direct.get(touch_id)
+        if direct is None:
+            direct = self.direct[touch_id] = self.sdl.SDL_GetTouchDeviceType(touch_id) == SDL_TOUCH_DEVICE_DIRECT
+        return direct
+
+    def queued_at(self, event, default):
+        """Returns when SDL queued a finger or button press, or default if the watch did not see it."""
+        if event.type == pygame.FINGERDOWN:
+            key = (event.type, event.touch_id, event.finger_id)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            key = (event.type, event.button, *event.pos)
+        else:
+            return default
+        with self.lock:
+            return self.stamps.pop(key, default)
+
+touch_input = TouchInput()
+
+class TapLatencyTracker:
+    """Time from a tap arriving to the first frame showing its feedback, and to its feedback clip starting."""
+    STAGES = ("frame", "audio")
+
+    def __init__(self):
+        self.pending = {} # stage -> arrival time of the tap still waiting for it
+        # Ring buffers allocated up front, so timing taps never grows memory
+        self.samples = {stage: np.zeros(TAP_LATENCY_SAMPLES) for stage in self.STAGES}
+        self.histograms = {stage: [0] * (len(TAP_LATENCY_BUCKETS_MS) + 1) for stage in self.STAGES}
+
+    def tapped(self, received_at):
+        """Starts timing a tap that gets feedback; a tap still waiting is superseded."""
+        self.pending = dict.fromkeys(self.STAGES, received_at)
+
+    def reached(self, stage):
+        """Stops the stage clock of the pending tap, if any."""
+        received_at = self.pending.pop(stage, None)
+        if received_at is None:
+            return
+        latency_ms = 1000 * (time.perf_counter() - received_at)
+        self.samples[stage][sum(self.histograms[stage]) % TAP_LATENCY_SAMPLES] = latency_ms
+        bucket = 0
+        while bucket < len(TAP_LATENCY_BUCKETS_MS) and latency_ms > TAP_LATENCY_BUCKETS_MS[bucket]:
+            bucket += 1
+        self.histograms[stage][bucket] += 1
+
+    def stats(self):
+        stats = {}
+        for stage in self.STAGES:
+            taps = sum(self.histograms[stage])
+            if not taps:
+                continue
+            ordered = np.sort(self.samples[stage][:min(taps, TAP_LATENCY_SAMPLES)])
+            stats[stage] = {
+                "taps": taps,
+                "p50_ms": round(float(ordered[len(ordered) // 2]), 2),
+                "p90_ms": round(float(ordered[len(ordered) * 9 // 10]), 2),
+                "max_ms": round(float(ordered[-1]), 2),
+                "within_target": round(float(np.mean(ordered <= TAP_FEEDBACK_TARGET_MS)), 4),
+                "histogram": dict(zip([f"<={ms}ms" for ms in TAP_LATENCY_BUCKETS_MS] + ["more"], self.histograms[stage])),
+            }
+        return stats
+
+    def report(self):
+        """Returns tap-to-feedback percentiles and histograms as printable lines."""
+        lines = []
+        for stage, entry in self.stats().items():
+            lines.append(f"tap to {stage:<6} {entry['taps']:5d} taps, p50 {entry['p50_ms']:6.1f} ms, p90 {entry['p90_ms']:6.1f} ms, "
+                         f"max {entry['max_ms']:6.1f} ms, {100 * entry['within_target']:5.1f} % within {TAP_FEEDBACK_TARGET_MS} ms")
+            lines.append("    " + "  ".join(f"{bucket} {count}" for bucket, count in entry["histogram"].items()))
+        return lines
+
+tap_latency = TapLatencyTracker()
+
+class FrameProfiler:
+    """Opt-in per-phase frame timing with rolling histograms, an on-screen overlay and a record stream."""
+    def __init__(self):
+        self.enabled = False
+        self.overlay = False
+        self.font = None
+        self.frame = 0
+        self.current = dict.fromkeys(PROFILE_PHASES, 0.0)
+        self.history = {phase: deque(maxlen=PROFILE_HISTORY) for phase in PROFILE_PHASES + ["total", "tts"]}
+        self.timers = {phase: _PhaseTimer(self, phase) for phase in PROFILE_PHASES}
+        self.null_timer = _NullTimer()
+        self.frame_started = time.perf_counter()
+        self.work_ended = self.frame_started
+        self.tts_seen = 0.0 # Synthesis seconds already charged to earlier frames
+        self.log_file = None
+        self.log_writer = None
+
+    def enable(self, log_path=None):
+        """Starts timing, optionally streaming one record per frame to a .csv or JSON lines file."""
+        self.enabled = True
+        if log_path:
+            self.log_file = open(log_path, "w", encoding="utf-8", newline="")
+            if log_path.endswith(".csv"):
+                self.log_writer = csv.writer(self.log_file)
+                self.log_writer.writerow(["frame", "mode", "time"] + [f"{name}_ms" for name in PROFILE_PHASES + ["total", "tts"]])
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.enabled = self.enabled or self.overlay
+
+    def phase(self, name):
+        """Returns a context manager timing a phase of the current frame."""
+        return self.timers[name] if self.enabled else self.null_timer
+
+    def idle_started(self):
+        """Marks the end of the frame's work; the rest until end_frame is idle time."""
+        self.work_ended = time.perf_counter()
+
+    def end_frame(self, mode, tts_total=0.0):
+        """Closes the current frame and charges unattributed work to event handling."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        current = self.current
+        current["idle"] = now - self.work_ended
+        work = self.work_ended - self.frame_started
+        current["events"] = max(0.0, work - current["draw"] - current["flip"] - current["speech"] - current["sound"])
+        tts = tts_total - self.tts_seen
+        self.tts_seen = tts_total
+        for name, seconds in current.items():
+            self.history[name].append(seconds)
+        self.history["total"].append(now - self.frame_started)
+        self.history["tts"].append(tts)
+        if self.log_file is not None:
+            self.write_record(mode, now - self.frame_started, tts)
+        self.frame += 1
+        self.frame_started = now
+        self.work_ended = now
+        for name in current:
+            current[name] = 0.0
+
+    def write_record(self, mode, total, tts):
+        values = [round(1000 * self.current[name], 3) for name in PROFILE_PHASES] + [round(1000 * total, 3), round(1000 * tts, 3)]
+        if self.log_writer is not None:
+            self.log_writer.writerow([self.frame, mode, round(time.time(), 3)] + values)
+        else:
+            record = {"frame": self.frame, "mode": mode, "time": round(time.time(), 3)}
+            record.update(zip([f"{name}_ms" for name in PROFILE_PHASES + ["total", "tts"]], values))
+            self.log_file.write(json.dumps(record) + "\n")
+
+    def histogram(self, name):
+        """Returns frame counts per PROFILE_BUCKETS_MS bucket for a phase; the last count is the overflow."""
+        counts = [0] * (len(PROFILE_BUCKETS_MS) + 1)
+        for seconds in self.history[name]:
+            ms = seconds * 1000
+            index = 0
+            while index < len(PROFILE_BUCKETS_MS) and ms > PROFILE_BUCKETS_MS[index]:
+                index += 1
+            counts[index] += 1
+        return counts
+
+    def summary(self):
+        """Returns {phase: (mean ms, max ms)} over the rolling history."""
+        result = {}
+        for name, samples in self.history.items():
+            if samples:
+                result[name] = (1000 * sum(samples) / len(samples), 1000 * max(samples))
+        return result
+
+    def draw_overlay(self, screen):
+        """Draws the rolling phase timings at the bottom left, above the hint line, and returns the covered rect."""
+        if self.font is None:
+            self.font = pygame.font.Font(None, 24)
+        lines = [f"frame {self.frame}   mean / max ms"]
+        for name, (mean, peak) in self.summary().items():
+            lines.append(f"{name:<7}{mean:7.2f} {peak:7.2f}  {self.histogram(name)}")
+        surfaces = [self.font.render(line, True, WHITE) for line in lines]
+        width = max(surface.get_width() for surface in surfaces) + 10
+        height = sum(surface.get_height() for surface in surfaces) + 10
+        # Every corner holds a button or label on some screen; this spot stays clear of the scores and titles
+        rect = pygame.Rect(0, 0, width, height)
+        rect.bottomleft = (10, screen.get_height() - PROFILE_OVERLAY_BOTTOM)
+        screen.fill(BLACK, rect)
+        y = rect.y + 5
+        for surface in surfaces:
+            screen.blit(surface, (rect.x + 5, y))
+            y += surface.get_height()
+        return rect
+
+    def close(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+profiler = FrameProfiler()
+
+class FrameScheduler:
+    """Blocks in pygame.event.wait while the screen is static and runs at the full frame rate only when busy."""
+    def __init__(self, clock, fps=FRAME_RATE):
+        self.clock = clock
+        self.fps = fps
+        self.wakeups = {} # mode -> number of times the loop woke up
+        self.cpu_time = {} # mode -> process CPU seconds
+        self.wall_time = {} # mode -> wall clock seconds
+        self.last_cpu = time.process_time()
+        self.last_wall = time.perf_counter()
+
+    def events(self, mode, busy=False, timeout_ms=IDLE_WAIT_MS):
+        """Returns the next batch of events for mode, sleeping until one arrives unless busy."""
+        profiler.idle_started()
+        if busy:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(max(1, int(timeout_ms)))
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events += pygame.event.get()
+        self.account(mode)
+        return events
+
+    def account(self, mode):
+        """Charges the time since the last wakeup to mode."""
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        self.wakeups[mode] = self.wakeups.get(mode, 0) + 1
+        self.cpu_time[mode] = self.cpu_time.get(mode, 0.0) + cpu - self.last_cpu
+        self.wall_time[mode] = self.wall_time.get(mode, 0.0) + wall - self.last_wall
+        self.last_cpu = cpu
+        self.last_wall = wall
+        profiler.end_frame(mode, self.tts_seconds())
+
+    def tts_seconds(self):
+        """Total background synthesis time so far, reported alongside the frame phases."""
+        return speech_service.busy_total if speech_service is not None else 0.0
+
+    def report(self):
+        """Returns wakeups per second and CPU use per mode as printable lines."""
+        lines = []
+        for mode, wall in self.wall_time.items():
+            wall = max(wall, 1e-9)
+            lines.append(f"{mode:<10} {self.wakeups[mode] / wall:8.1f} wakeups/s "
+                         f"{self.cpu_time[mode]:8.2f} s CPU ({100 * self.cpu_time[mode] / wall:5.1f} %) over {wall:.1f} s")
+        return lines
+
+class DirtyRenderer:
+    """Composes a screen from a cached static layer plus per-frame items, pushing only changed regions."""
+    def __init__(self, screen, draw_static, enabled=DIRTY_RENDERING):
+        self.screen = screen
+        self.draw_static = draw_static # Callable drawing the static content onto a surface
+        self.enabled = enabled
+        self.background = None
+        self.previous = [] # Rects drawn by the last frame, restored from the background next frame
+        self.current = []
+        self.full_redraw = True
+
+    def reset(self, screen=None):
+        """Rebuilds the static layer on the next frame, e.g. after the display surface changed."""
+        if screen is not None:
+            self.screen = screen
+        self.background = None
+        self.full_redraw = True
+
+    def begin(self):
+        """Starts a frame by restoring the regions the previous frame drew over."""
+        self.draw_started = time.perf_counter()
+        if self.background is None:
+            self.background = pygame.Surface(self.screen.get_size()).convert()
+            self.background.fill(DARK_GRAY)
+            self.draw_static(self.background)
+        if self.full_redraw or not self.enabled:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+        self.current = []
+
+    def blit(self, surface, dest):
+        rect = self.screen.blit(surface, dest)
+        self.current.append(rect)
+        return rect
+
+    def rect(self, color, rect, width=0):
+        rect = pygame.draw.rect(self.screen, color, rect, width)
+        self.current.append(rect)
+        return rect
+
+    def button(self, button, font):
+        button.draw(self.screen, font)
+        self.current.append(button.rect)
+
+    def end(self):
+        """Pushes the frame: the changed regions in dirty mode, the whole screen otherwise."""
+        if profiler.overlay:
+            self.current.append(profiler.draw_overlay(self.screen))
+        flip_started = time.perf_counter()
+        if profiler.enabled:
+            profiler.current["draw"] += flip_started - self.draw_started
+        if self.full_redraw or not self.enabled:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.previous = self.current
+        self.full_redraw = False
+        if profiler.enabled:
+            profiler.current["flip"] += time.perf_counter() - flip_started
+        startup.frame_shown()
+
+class PaletteGrid:
+    """Paged grid of color checkboxes with constant-time hit-testing."""
+    def __init__(self, names, area, cell_size=PALETTE_CELL_SIZE, pitch=PALETTE_CELL_PITCH, rows=None):
+        self.names = names
+        self.cell_size = cell_size
+        self.pitch = pitch
+        self.columns = max(1, area.width // pitch)
+        self.rows = rows or max(1, area.height // pitch)
+        self.per_page = self.columns * self.rows
+        self.pages = max(1, -(-len(names) // self.per_page))
+        self.page = 0
+        # A short palette is centered like a single row of checkboxes
+        used_columns = min(self.columns, len(names))
+        self.left = area.x + (area.width - pitch * used_columns) // 2
+        self.top = area.y
+
+    def set_page(self, page):
+        self.page = max(0, min(page, self.pages - 1))
+
+    def cell_rect(self, slot):
+        row, column = divmod(slot, self.columns)
+        return pygame.Rect(self.left + column * self.pitch, self.top + row * self.pitch, self.cell_size, self.cell_size)
+
+    def visible(self):
+        """Yields (name, rect) for the cells on the current page only."""
+        start = self.page * self.per_page
+        for slot, name in enumerate(self.names[start:start + self.per_page]):
+            yield name, self.cell_rect(slot)
+
+    def hit(self, pos):
+        """Returns the name of the cell at pos, or None, by indexing the uniform grid directly."""
+        column, dx = divmod(pos[0] - self.left, self.pitch)
+        row, dy = divmod(pos[1] - self.top, self.pitch)
+        if not (0 <= column < self.columns and 0 <= row < self.rows) or dx >= self.cell_size or dy >= self.cell_size:
+            return None
+        index = self.page * self.per_page + row * self.columns + column
+        return self.names[index] if index < len(self.names) else None
+
 class Styled_Text_Box:
     def __init__(self, surface, rect, text_surface, bg_color, padding=15, border_width=2, border_color=BLACK):
         self.surface = surface
@@ -153,516 +2067,1165 @@ class Button:
 
     def draw(self, screen, font):
         pygame.draw.rect(screen, self.color, self.rect)
-        rendered_text = font.render(self.text, True, self.text_color)
+        rendered_text = text_cache.render(font, self.text, True, self.text_color)
         text_rect = rendered_text.get_rect(center=self.rect.center) # Center the text in the button
         screen.blit(rendered_text, text_rect)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
+    def place(self, rect):
+        """Moves the button to a rect of the current layout."""
+        self.x, self.y, self.width, self.height = rect
+        self.rect = rect
+
+def anchored(anchor, x, y, width=0, height=0):
+    """Returns a width x height Rect whose anchor point (e.g. "midtop") is at x, y; 0 x 0 marks a text position."""
+    rect = pygame.Rect(0, 0, width, height)
+    setattr(rect, anchor, (x, y))
+    return rect
+
+def menu_button_rect(width, height, index, count=4, size=(300, 50), spacing=20):
+    """Rect of the index-th button of a vertical stack centered on screen."""
+    total_height = count * size[1] + (count - 1) * spacing
+    return anchored("midtop", width // 2, height // 2 - total_height // 2 + index * (size[1] + spacing), *size)
+
+def square_rects(width, height, num_choices, max_choices):
+    """Rects of the answer squares, spread evenly across the screen."""
+    size = min(width // max_choices - 10, height // 3)
+    spacing = width // num_choices - size
+    total_width = num_choices * size + (num_choices - 1) * spacing
+    start_x = (width - total_width) // 2
+    return [pygame.Rect(start_x + i * (size + spacing), height // 2 - size, size, size) for i in range(num_choices)]
+
+# Every screen element as a function of the screen width, height and the layout parameters
+LAYOUTS = {
+    "menu": {
+        "title": lambda w, h, p: anchored("center", w // 2, h // 8),
+        "prompt": lambda w, h, p: anchored("bottomleft", 20, h - 20),
+        "colors": lambda w, h, p: menu_button_rect(w, h, 0),
+        "options": lambda w, h, p: menu_button_rect(w, h, 1),
+        "learner": lambda w, h, p: menu_button_rect(w, h, 2),
+        "quit": lambda w, h, p: menu_button_rect(w, h, 3),
+    },
+    "options": {
+        "prompt": lambda w, h, p: anchored("bottomleft", 20, h - 20),
+        "back": lambda w, h, p: anchored("topright", w - 20, 20, 200, 50),
+        "difficulty": lambda w, h, p: anchored("topleft", 20, 20, 300, 50),
+        "title": lambda w, h, p: anchored("midtop", w // 2, 50),
+        "choices_label": lambda w, h, p: anchored("midtop", w // 2, h // 5 - 50),
+        "num_choices": lambda w, h, p: anchored("midtop", w // 2, h // 5 + 10),
+        "minus": lambda w, h, p: anchored("topleft", w // 2 - 75, h // 5, 50, 50),
+        "plus": lambda w, h, p: anchored("topleft", w // 2 + 25, h // 5, 50, 50),
+        "available_label": lambda w, h, p: anchored("midtop", w // 2, h * 2 // 5 - 50),
+        "available": lambda w, h, p: pygame.Rect(PALETTE_MARGIN, h * 2 // 5, w - 2 * PALETTE_MARGIN, h // 5 - 60),
+        "force_label": lambda w, h, p: anchored("midtop", w // 2, h * 3 // 5 - 50),
+        "force": lambda w, h, p: pygame.Rect(PALETTE_MARGIN, h * 3 // 5, w - 2 * PALETTE_MARGIN, h // 5 - 60),
+        "page_prev": lambda w, h, p: anchored("center", PALETTE_MARGIN // 2, h // 2, 50, 50),
+        "page_next": lambda w, h, p: anchored("center", w - PALETTE_MARGIN // 2, h // 2, 50, 50),
+        "page_label": lambda w, h, p: anchored("midtop", w // 2, h * 4 // 5 - 40),
+        "ok": lambda w, h, p: anchored("midtop", w // 2, h * 4 // 5, 200, 50),
+        "language": lambda w, h, p: anchored("bottomright", w - 20, h - 20, 300, 50),
+    },
+    "colors": {
+        "prompt": lambda w, h, p: anchored("bottomleft", 20, h - 20),
+        "back": lambda w, h, p: anchored("topright", w - 20, 20, 200, 50),
+        "score": lambda w, h, p: anchored("topleft", 20, 20),
+        "question": lambda w, h, p: anchored("midtop", w // 2, 50),
+        "squares": lambda w, h, p: square_rects(w, h, p["num_choices"], p["max_choices"]),
+        "result": lambda w, h, p: anchored("midtop", w // 2, h - h // 9),
+        "face": lambda w, h, p: anchored("midtop", w // 2, h // 2 + 50),
+        "next": lambda w, h, p: anchored("bottomright", w - 20, h - 20, 200, 50),
+        "final_score": lambda w, h, p: anchored("midtop", w // 2, h // 5),
+        "well_done": lambda w, h, p: anchored("midtop", w // 2, h // 2 - 50),
+        "new_game": lambda w, h, p: anchored("topright", w // 2 - 10, h // 2 + 50, 200, 50),
+        "exit": lambda w, h, p: anchored("topleft", w // 2 + 10, h // 2 + 50, 200, 50),
+    },
+}
+
+class LayoutCache:
+    """Screen layouts computed once per screen, resolution and parameters.
+
+    A new resolution drops every cached layout; the rects are shared, so callers must not move them.
+    """
+    def __init__(self, specs=LAYOUTS):
+        self.specs = specs
+        self.size = None
+        self.layouts = {} # (screen, params) -> {element: Rect or list of Rects}
+        self.builds = 0
+
+    def get(self, screen, size, **params):
+        if size != self.size:
+            self.layouts.clear()
+            self.size = size
+        key = (screen, tuple(sorted(params.items())))
+        layout = self.layouts.get(key)
+        if layout is None:
+            width, height = size
+            layout = self.layouts[key] = {name: spec(width, height, params) for name, spec in self.specs[screen].items()}
+            self.builds += 1
+        return layout
+
+class FileWatcher:
+    """Polls the modification times of a set of files on a background thread.
+
+    Changed paths are posted as one CONFIG_CHANGED_EVENT per poll, so the game applies
+    them on its own thread. Polling works the same on every platform the kiosks run.
+    """
+    def __init__(self, paths=(), interval=CONFIG_POLL_SECONDS):
+        self.interval = interval
+        self.stamps = {} # path -> (mtime_ns, size), None while the file is missing
+        self.lock = threading.Lock()
+        self.set_paths(paths)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def set_paths(self, paths):
+        """Watches paths from now on; paths already watched keep their last stamp."""
+        with self.lock:
+            self.stamps = {path: self.stamps[path] if path in self.stamps else self._stamp(path) for path in paths}
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            changed = []
+            with self.lock:
+                for path, stamp in self.stamps.items():
+                    current = self._stamp(path)
+                    if current != stamp:
+                        self.stamps[path] = current
+                        changed.append(path)
+            if changed:
+                try:
+                    pygame.event.post(pygame.event.Event(CONFIG_CHANGED_EVENT, paths=changed))
+                except pygame.error:
+                    return # Display already shut down
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
 class MainGame:
     """Main class to manage the Game."""
-    def __init__(self):
-        pygame.init()
-
-        # graphics init
-        self.screen_width = FULLSCREEN_RESOLUTION[0]
-        self.screen_height = FULLSCREEN_RESOLUTION[1]
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height), pygame.FULLSCREEN)
-        # self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Game Title")
-        self.fullscreen = True
+    def __init__(self, catalog=None, profile_db=PROFILE_DB_PATH, sync=None, asset_pack=ASSET_PACK, config_path=CONFIG_FILE_PATH, watch=True, locale=DEFAULT_LOCALE,
+                 answer_log_dir=ANSWER_LOG_DIR):
+        # Only what the menu needs happens here; _load prepares the rest on a background thread
+        with startup.stage("display"):
+            pygame.display.init()
+            pygame.font.init()
+            touch_input.install()
+
+            # graphics init, at the native resolution of the panel unless the config asks for a window
+            self.config_path = config_path
+            self.config = load_config(config_path)
+            self.fullscreen = self.config["fullscreen"]
+            if self.fullscreen:
+                self.screen = pygame.display.set_mode(native_resolution(), pygame.FULLSCREEN)
+            else:
+                self.screen = pygame.display.set_mode(self.windowed_size())
+            self.screen_width, self.screen_height = self.screen.get_size()
+            pygame.display.set_caption("Game Title")
+            self.layouts = LayoutCache()
 
         # fonts init
-        self.title_font = pygame.font.Font(None, 48)
-        self.text_font = pygame.font.Font(None, 36)
-        self.button_font = pygame.font.Font(None, 36)
-        self.game_font = pygame.font.SysFont("arial", 52)
+        with startup.stage("fonts"):
+            self.title_font = pygame.font.Font(None, 48)
+            self.text_font = pygame.font.Font(None, 36)
+            self.normal_font = pygame.font.Font(None, 74)
+            self.big_font = pygame.font.Font(None, 96)
+            self.button_font = pygame.font.Font(None, 50)
+            self.score_font = pygame.font.Font(None, 50)
+            # Only the language in use is read; a learner's saved language replaces it once profiles load
+            self.locale = Locale.load(locale)
 
         # common variables init
-        pygame.mixer.init()
         self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler(self.clock)
+        # Pointer motion is never used; dropping it keeps the idle loops asleep
+        pygame.event.set_blocked([pygame.MOUSEMOTION, pygame.FINGERMOTION])
         self.running = True
         self.game_mode = "menu"
         self.play_welcome_sound = True
-
-        # --- start of game variables ---
-
-        # Fonts
-        self.normal_font = pygame.font.Font(None, 74)
-        self.big_font = pygame.font.Font(None, 96)
-        self.button_font = pygame.font.Font(None, 50)
-        self.score_font = pygame.font.Font(None, 50)
+        self.ui = {} # Name -> Rect of the tappable elements on the current screen, for scripted input
+        self.question = None # Target color and square rects of the question on screen
+        self.deck = None # QuestionDeck of the current round
+        self.input_at = time.perf_counter() # perf_counter time the last batch of events was received
 
         # Game variables
         self.num_choices = 2 # Customizable number of choices
         self.min_num_choices = 1 # Minimum number of choices
         self.max_num_choices = 5 # Maximum number of choices
-        self.square_size = self.screen_width // self.max_num_choices - 10  # Square size based on max number of choices
-
-        self.well_done_sound = generate_speech_sound("You did it! Good job!")
-        self.click_sound = pygame.mixer.Sound("assets/mouse_click.wav")
-        self.right_sounds = [
-            generate_speech_sound("Awesome!"),
-            generate_speech_sound("Excellent!"),
-            generate_speech_sound("Good!"),
-            generate_speech_sound("Great!"),
-            generate_speech_sound("Right!"),
-            generate_speech_sound("Very good!"),
-            generate_speech_sound("Yes!")
-            ]
-        self.wrong_sounds = [
-            generate_speech_sound("Bad!"),
-            generate_speech_sound("No!"),
-            generate_speech_sound("Not good!"),
-            generate_speech_sound("Wrong!"),
-            generate_speech_sound("No good!"),
-            generate_speech_sound("Not right!")
-        ]
-
-        self.happy_face = pygame.image.load("assets/happy_face.png") 
-        self.sad_face = pygame.image.load("assets/red_sad_face.png")     
-        self.happy_face = pygame.transform.scale(self.happy_face, (200, 200))  
-        self.sad_face = pygame.transform.scale(self.sad_face, (200, 200))      
-
-        self.color_items = {}
-        self.color_items = {
-            "black": { 
-                "value" : (0, 0, 0),
-                "sound" : pygame.mixer.Sound("assets/black.wav"),
-                "toggle" : True
-            },
-            "white": { 
-                "value" : (255, 255, 255),
-                "sound" : pygame.mixer.Sound("assets/white.wav"),
-                "toggle" : True
-            },
-            "red": { 
-                "value" : (255, 0, 0),
-                "sound" : pygame.mixer.Sound("assets/red.wav"),
-                "toggle" : False
-            },
-            "green": { 
-                "value" : (0, 255, 0),
-                "sound" : pygame.mixer.Sound("assets/green.wav"),
-                "toggle" : False
-            },
-            "blue": { 
-                "value" : (0, 0, 255),
-                "sound" : pygame.mixer.Sound("assets/blue.wav"),
-                "toggle" : False
-            },
-            "yellow": { 
-                "value" : (255, 255, 0),
-                "sound" : pygame.mixer.Sound("assets/yellow.wav"),
-                "toggle" : False
-            },
-            "purple": { 
-                "value" : (128, 0, 128),
-                "sound" : pygame.mixer.Sound("assets/purple.wav"),
-                "toggle" : False
-            },
-            "pink": { 
-                "value" : (255, 182, 193),
-                "sound" : pygame.mixer.Sound("assets/pink.wav"),
-                "toggle" : False
-            }
-        }
-
-
-                # --- end of game variables ---
+        self.sync = sync # Optional SyncClient to the classroom server
+        self.answer_log_dir = answer_log_dir # Where the taps are logged; scripted runs keep theirs apart
+        self.audio = None
+        self.learner = None
+        self.load_error = None
+        self.loaded = threading.Event()
+        self.catalog_path = COLOR_CATALOG_FILE if catalog is None else None # Only a catalog read from file is reloaded
+        self.watcher = None
+        self.loader = threading.Thread(target=self._load, args=(catalog, profile_db, asset_pack, watch), name="loader", daemon=True)
+        self.loader.start()
+
+    def _load(self, catalog, profile_db, asset_pack, watch):
+        """Loads everything the first frame can do without, in stages."""
+        try:
+            global speech_service
+            with startup.stage("mixer"):
+                pygame.mixer.init()
+                self.audio = AudioScheduler()
+                self.speech = speech_service = SpeechService(self.locale.speech)
+
+            with startup.stage("catalog"):
+                self.catalog = catalog or ColorCatalog.load()
+                self.color_items = {}
+                for i, name in enumerate(self.catalog.names):
+                    self.color_items[name] = {
+                        "value" : self.catalog.value(i),
+                        "toggle" : bool(self.catalog.toggles[i])
+                    }
+                self.toggled_mask = self.catalog.toggles.copy() # Toggles in catalog order, for vectorized picks
+                self.difficulty = "adaptive"
+                self.tutor = AdaptiveTutor(len(self.catalog.names))
+                self.rng = np.random.default_rng(random.getrandbits(64))
+
+                self.COLOR_NAMES = list(self.color_items.keys())
+                self.num_toggled = sum(1 for item in self.color_items.values() if item["toggle"]) # Kept up to date by set_toggle
+                self.force_correct_color = None
+                self.palette_page = 0
+
+            with startup.stage("answer log"):
+                self.answer_log = AnswerLog(self.answer_log_dir)
+
+            # Settings of the first learner replace the defaults above
+            with startup.stage("profiles"):
+                self.profiles = ProfileStore(profile_db)
+                self.learners = self.profiles.names() or [DEFAULT_LEARNER]
+                self.load_profile(self.learners[0])
+
+            with startup.stage("speech requests"):
+                # Synthesis runs on the speech workers, which need the mixer; this only queues it
+                self.request_phrases()
+
+            # Sounds and images load on first use; warm up only what the current settings can show
+            with startup.stage("assets"):
+                self.assets = AssetRegistry(pack_path=asset_pack)
+                self.assets.set_display(self.screen)
+                self.assets.warm_up(self.assets_in_play())
+
+            if watch:
+                self.watcher = FileWatcher(self.watched_paths())
+        except Exception as e:
+            self.load_error = e
+        finally:
+            self.loaded.set()
+            try:
+                pygame.event.post(pygame.event.Event(LOADING_DONE_EVENT))
+            except pygame.error:
+                pass # Display already shut down
+
+    def wait_loaded(self):
+        """Blocks until the background loader is done, re-raising what made it fail."""
+        if not self.loaded.is_set():
+            with startup.stage("waiting for loader"):
+                self.loaded.wait()
+        if self.load_error is not None:
+            raise self.load_error
 
-        self.COLOR_NAMES = list(self.color_items.keys())
-        self.force_correct_color = None
     def run(self):
         """Main game loop."""
         while self.running:
+            if self.game_mode != "menu":
+                self.wait_loaded()
+            if self.audio is not None:
+                self.audio.advance() # Nothing said on the previous screen is worth finishing
             if self.game_mode == "menu":
                 self.run_menu()
             elif self.game_mode == "colors":
                 self.run_colors()
             elif self.game_mode == "options":
                 self.run_options()
-            self.clock.tick(60)
+        self.wait_loaded()
+        if self.watcher is not None:
+            self.watcher.close()
+        self.speech.shutdown()
+        self.answer_log.close()
+        if self.sync is not None:
+            self.sync.close()
+        self.profiles.close()
+        profiler.close()
+        touch_input.close()
         pygame.quit()
 
+    def toggle_fullscreen(self):
+        """Switches between the native and the windowed resolution and moves the image atlas to the new display surface."""
+        self.wait_loaded()
+        self.fullscreen, self.screen = toggle_fullscreen(native_resolution(), self.windowed_size(), self.fullscreen)
+        self.screen_changed()
+
+    def screen_changed(self):
+        """Picks up the surface set_mode returned: its size for the layouts and its format for the image atlas."""
+        self.screen_width, self.screen_height = self.screen.get_size()
+        self.assets.set_display(self.screen)
+
+    def windowed_size(self):
+        return windowed_resolution((self.config["screen_width"], self.config["screen_height"]))
+
+    def watched_paths(self):
+        """The files reload() knows how to apply."""
+        paths = [self.config_path] + self.assets.watched_paths()
+        if self.catalog_path:
+            paths.append(self.catalog_path)
+        return paths
+
+    def reload(self, paths):
+        """Applies the changed config, catalog and asset files in place, keeping the session; returns True if the screen must be laid out again."""
+        paths = set(paths)
+        redraw = False
+        if self.config_path in paths:
+            try:
+                config = read_config(self.config_path)
+            except (OSError, ValueError) as e:
+                print(f"Error reloading configuration, keeping the current one: {e}")
+            else:
+                old_size = self.windowed_size()
+                self.config = config
+                if config["fullscreen"] != self.fullscreen:
+                    self.toggle_fullscreen()
+                    redraw = True
+                elif not self.fullscreen and self.windowed_size() != old_size:
+                    self.screen = pygame.display.set_mode(self.windowed_size())
+                    self.screen_changed()
+                    redraw = True
+        if self.catalog_path in paths:
+            redraw |= self.reload_catalog()
+        changed = self.assets.reload(paths)
+        if changed:
+            self.assets.warm_up([name for name in self.assets_in_play() if name in changed])
+            redraw |= any(name in self.assets.images for name in changed)
+        if self.watcher is not None:
+            self.watcher.set_paths(self.watched_paths()) # The manifest may list other files now
+        return redraw
+
+    def reload_catalog(self):
+        """Takes new color values from the catalog file; returns True if any changed."""
+        try:
+            catalog = ColorCatalog.load(self.catalog_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reloading color catalog: {e}")
+            return False
+        if catalog.names != self.catalog.names:
+            # The tutor, the profiles and the round are indexed by catalog position
+            print("Error reloading color catalog: colors were added, removed or reordered, restart the game to apply")
+            return False
+        changed = [name for i, name in enumerate(catalog.names) if catalog.value(i) != self.color_items[name]["value"]]
+        for name in changed:
+            self.color_items[name]["value"] = catalog.value(catalog.index[name])
+        catalog.toggles = self.catalog.toggles # Default toggles only apply to new learners at startup
+        self.catalog = catalog
+        return bool(changed)
+
+    def layout(self, screen, **params):
+        """Rects of the elements of screen at the current resolution, see LAYOUTS."""
+        return self.layouts.get(screen, (self.screen_width, self.screen_height), **params)
+
+    def play_sound(self, name):
+        """Plays a sound from the asset registry."""
+        with profiler.phase("sound"):
+            sound = self.assets.sound(name)
+            if sound is not None:
+                self.audio.click(sound)
+
+    def assets_in_play(self):
+        """Names of the assets the current settings can use; the color name clips are never played, so they stay unloaded."""
+        return list(UI_ASSETS)
+
+    def set_toggle(self, color, toggle):
+        """Turns a color on or off, keeping the toggled count current."""
+        if self.color_items[color]["toggle"] != toggle:
+            self.color_items[color]["toggle"] = toggle
+            self.toggled_mask[self.catalog.index[color]] = toggle
+            self.num_toggled += 1 if toggle else -1
+
+    def request_phrases(self):
+        """Requests the feedback phrases of the current language from the speech workers."""
+        phrases = self.locale.phrases
+        self.well_done_sound = self.speech.request(phrases["well_done"])
+        self.right_sounds = [self.speech.request(phrase) for phrase in phrases["right"]]
+        self.wrong_sounds = [self.speech.request(phrase) for phrase in phrases["wrong"]]
+
+    def set_locale(self, code):
+        """Switches labels and speech to another language; only one language is held in memory."""
+        if code == self.locale.code:
+            return True
+        try:
+            locale = Locale.load(code)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading locale \"{code}\": {e}")
+            return False
+        self.locale = locale
+        text_cache.clear() # Labels of the old language are never drawn again
+        self.speech.set_lang(locale.speech)
+        if self.loaded.is_set():
+            self.request_phrases() # Warms up the new language in the background
+        return True
+
+    def next_locale(self):
+        """Cycles through the installed languages."""
+        codes = available_locales()
+        index = codes.index(self.locale.code) if self.locale.code in codes else -1
+        self.set_locale(codes[(index + 1) % len(codes)])
+
+    def settings(self):
+        """Returns the learner-specific settings, as saved in the profile store."""
+        return {"num_choices": self.num_choices, "force_color": self.force_correct_color, "difficulty": self.difficulty,
+                "toggles": [c for c in self.COLOR_NAMES if self.color_items[c]["toggle"]], "language": self.locale.code}
+
+    def load_profile(self, name):
+        """Switches to a learner, applying their saved settings and tutor state."""
+        self.learner = name
+        profile = self.profiles.load(name)
+        if profile is None:
+            self.tutor = AdaptiveTutor(len(self.catalog.names)) # New learners keep the current settings
+            return
+        if profile["language"]:
+            self.set_locale(profile["language"])
+        toggled = set(profile["toggles"]) & set(self.COLOR_NAMES)
+        if len(toggled) < self.min_num_choices:
+            return # Saved for a different catalog
+        for acolor in self.COLOR_NAMES:
+            self.set_toggle(acolor, acolor in toggled)
+        self.num_choices = max(self.min_num_choices, min(profile["num_choices"], self.max_num_choices, self.num_toggled))
+        self.force_correct_color = profile["force_color"] if profile["force_color"] in toggled else None
+        self.difficulty = profile["difficulty"] if profile["difficulty"] in DIFFICULTY_LEVELS else self.difficulty
+        self.tutor = AdaptiveTutor.from_bytes(profile["tutor"], len(self.catalog.names))
+
+    def next_learner(self, step=1):
+        """Cycles through the learners; their profiles are saved when the screens editing them are left."""
+        index = self.learners.index(self.learner) if self.learner in self.learners else -1
+        self.load_profile(self.learners[(index + step) % len(self.learners)])
+
+    def play_speech(self, future, kind="prompt"):
+        """Hands a requested speech clip to the audio scheduler; kind is "feedback" or a VOICE_PRIORITIES key."""
+        with profiler.phase("speech"):
+            if kind == "feedback":
+                self.audio.feedback(future)
+            else:
+                self.audio.say(future, kind)
+
+    def play_ready_speech(self):
+        """Starts the speech clips whose synthesis has finished, if their channel is free."""
+        if self.audio is None:
+            return # Still loading
+        started = time.perf_counter()
+        with profiler.phase("speech"):
+            self.audio.pump()
+        self.speech.render_wait_max = max(self.speech.render_wait_max, time.perf_counter() - started)
+
+    def events(self, mode, busy=False, timeout_ms=IDLE_WAIT_MS):
+        """Waits for the events of mode like FrameScheduler.events; fingers become taps, end-of-clip and file change events are handled here."""
+        events = self.scheduler.events(mode, busy=busy, timeout_ms=timeout_ms)
+        self.input_at = time.perf_counter() # When this batch of input reached the game, for taps SDL did not stamp
+        handled = []
+        for event in events:
+            if event.type == pygame.FINGERDOWN:
+                if not touch_input.is_direct(event.touch_id):
+                    continue # Touchpad fingers, and every finger where SDL cannot say, reach the game as mouse presses
+                # Touchscreen taps arrive as fingers first; the screens only need a position
+                pos = (int(event.x * self.screen_width), int(event.y * self.screen_height))
+                handled.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1, touch=True, at=touch_input.queued_at(event, self.input_at)))
+                continue
+            if event.type == pygame.MOUSEBUTTONDOWN and getattr(event, "touch", False) and touch_input.active:
+                continue # The late mouse emulation of a touchscreen finger already handled above
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button in (4, 5):
+                continue # Wheel notches, which also arrive as MOUSEWHEEL; they are not taps
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                event.at = touch_input.queued_at(event, self.input_at) # When SDL queued the press
+            if self.audio is None:
+                handled.append(event)
+                continue
+            if self.audio.handle(event):
+                continue
+            if event.type == CONFIG_CHANGED_EVENT:
+                if self.reload(event.paths):
+                    handled.append(pygame.event.Event(SCREEN_CHANGED_EVENT))
+                continue
+            handled.append(event)
+        return handled
+
+    def build_questions(self, count):
+        """Yields the count questions of a round, each with its colors in square order, label surface and requested prompt clip."""
+        forced = self.catalog.index[self.force_correct_color] if self.force_correct_color else None
+        candidates = [forced] if forced is not None else np.flatnonzero(self.toggled_mask)
+        # Adaptive rounds deal the colors with the most confused pairs first
+        weights = self.tutor.target_weights(candidates) if self.difficulty == "adaptive" and forced is None else None
+        for target in deal_targets(candidates, count, self.rng, weights):
+            correct_color, square_colors = self.generate_squares(self.num_choices, target)
+            with profiler.phase("speech"):
+                speech = self.speech.request(self.locale.prompt(correct_color)) # Synthesized and decoded by the speech workers meanwhile
+            yield {
+                "target": correct_color,
+                "colors": square_colors,
+                "label": text_cache.render(self.normal_font, self.locale.label("find_color", color=self.locale.color(correct_color).capitalize()), True, "black"),
+                "speech": speech,
+            }
+
     def run_menu(self):
         """Handles the main menu loop."""
-        # Title text top center
-        title_text = self.title_font.render("The Learning Colors Game", True, DARK_BLUE)
-        title_rect = title_text.get_rect(center=(self.screen_width // 2, self.screen_height // 8))
-
-        # Prompt text lower left corner
-        prompt_text = self.text_font.render("Hint: Tap or click on a button to start.", True, WHITE)
-        prompt_rect = prompt_text.get_rect(bottomleft=(20, self.screen_height - 20))
-
-        # Arrange buttons in a vertical stack centered on screen
-        button_width = 300
-        button_height = 50
-        spacing = 20
-        total_height = 4 * button_height + 3 * spacing
-        start_y = self.screen_height // 2 - total_height // 2
-        center_x = self.screen_width // 2 - button_width // 2
-
-        menu_colors_button = Button(center_x, start_y, "Find Colors", button_width, button_height, DARK_GREEN)
-        menu_options_button = Button(center_x, start_y + (button_height + spacing), "Options", button_width, button_height, DARK_GREEN)
-        menu_quit_button = Button(center_x, start_y + (button_height + spacing) * 2, "Quit", button_width, button_height, DARK_RED)
-
-        play_menu_sound = False
-        while self.game_mode == "menu" and self.running:
-            self.clock.tick(60)
-            self.screen.fill(DARK_GRAY)
-
+        # Buttons in a vertical stack centered on screen, placed by place()
+        menu_colors_button = Button(0, 0, "", color=DARK_GREEN)
+        menu_options_button = Button(0, 0, "", color=DARK_GREEN)
+        menu_learner_button = Button(0, 0, "", color=DARK_BLUE)
+        menu_quit_button = Button(0, 0, "", color=DARK_RED)
+
+        def place():
+            """Places the texts in the current language; a learner's saved language can replace it once loaded."""
+            nonlocal title_text, title_rect, prompt_text, prompt_rect
+            # Title text top center, prompt text lower left corner
+            title_text = text_cache.render(self.title_font, self.locale.label("title"), True, DARK_BLUE)
+            prompt_text = text_cache.render(self.text_font, self.locale.label("menu_hint"), True, WHITE)
+            menu_colors_button.text = self.locale.label("find_colors")
+            menu_options_button.text = self.locale.label("options")
+            menu_quit_button.text = self.locale.label("quit")
+            layout = self.layout("menu")
+            title_rect = title_text.get_rect(center=layout["title"].center)
+            prompt_rect = prompt_text.get_rect(bottomleft=layout["prompt"].topleft)
+            menu_colors_button.place(layout["colors"])
+            menu_options_button.place(layout["options"])
+            menu_learner_button.place(layout["learner"])
+            menu_quit_button.place(layout["quit"])
+            self.ui = {"colors": menu_colors_button.rect, "options": menu_options_button.rect, "learner": menu_learner_button.rect, "quit": menu_quit_button.rect}
+
+        title_text = title_rect = prompt_text = prompt_rect = None
+        place()
+
+        def draw_static(surface):
             # Draw title and prompt at the top
-            pygame.draw.rect(self.screen, LIGHT_YELLOW, title_rect.inflate(20, 10))
-            self.screen.blit(title_text, title_rect)
-            self.screen.blit(prompt_text, prompt_rect)
+            pygame.draw.rect(surface, LIGHT_YELLOW, title_rect.inflate(20, 10))
+            surface.blit(title_text, title_rect)
+            surface.blit(prompt_text, prompt_rect)
 
             # Draw buttons in center
-            menu_colors_button.draw(self.screen, self.button_font)
-            menu_options_button.draw(self.screen, self.button_font)
-            menu_quit_button.draw(self.screen, self.button_font)
+            menu_colors_button.draw(surface, self.button_font)
+            menu_options_button.draw(surface, self.button_font)
+            menu_quit_button.draw(surface, self.button_font)
 
-            pygame.display.flip()
+        renderer = DirtyRenderer(self.screen, draw_static)
+        redraw = True
 
-            # Play welcome sound once
-            if self.play_welcome_sound:
-                welcome_sound = generate_speech_sound("Welcome to Learning Colors Game!")
-                welcome_sound.play()
+        play_menu_sound = False
+        while self.game_mode == "menu" and self.running:
+            # Only the learner button changes; everything else is in the static layer
+            if redraw:
+                renderer.begin()
+                menu_learner_button.text = self.locale.label("learner", learner=self.learner) if self.loaded.is_set() else self.locale.label("loading")
+                renderer.button(menu_learner_button, self.button_font)
+                renderer.end()
+                redraw = False
+
+            # Play welcome sound once, as soon as the mixer is up
+            if self.play_welcome_sound and self.loaded.is_set():
+                self.play_speech(self.speech.request(self.locale.phrases["welcome"]), "welcome")
                 self.play_welcome_sound = False
+            self.play_ready_speech()
 
             if play_menu_sound:
-                menu_sound = generate_speech_sound("Menu screen sound goes here...")
-                menu_sound.play()
+                self.play_speech(self.speech.request("Menu screen sound goes here..."), "menu")
                 play_menu_sound = False
-                while pygame.mixer.get_busy():
-                    self.clock.tick(10)
 
-            for event in pygame.event.get():
+            for event in self.events("menu", busy=redraw):
+                if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                    self.wait_loaded() # Only a very quick tap can get here first
                 if event.type == pygame.QUIT:
                     self.running = False
+                elif event.type == LOADING_DONE_EVENT:
+                    # The first learner's language is known now
+                    place()
+                    renderer.reset()
+                    redraw = True
+                elif event.type == SCREEN_CHANGED_EVENT:
+                    # A reloaded config or asset changed the screen
+                    place()
+                    renderer.reset(self.screen)
+                    redraw = True
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN and pygame.key.get_mods() & pygame.KMOD_ALT:
-                        self.fullscreen, self.screen = toggle_fullscreen(self.screen, self.screen_width, self.screen_height, self.fullscreen)
+                        self.toggle_fullscreen()
+                        place()
+                        renderer.reset(self.screen)
+                        redraw = True
+                    elif event.key == pygame.K_F3:
+                        # Toggle the frame profiler overlay
+                        profiler.toggle_overlay()
+                        renderer.reset()
+                        redraw = True
                     elif event.key == pygame.K_ESCAPE or event.key == pygame.K_q:
                         self.running = False
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        # Switch learner
+                        self.next_learner(1 if event.key == pygame.K_RIGHT else -1)
+                        place() # The next learner may speak another language
+                        renderer.reset()
+                        redraw = True
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if menu_colors_button.is_clicked(event.pos):
-                        self.click_sound.play()
+                    if menu_learner_button.is_clicked(event.pos):
+                        self.play_sound("click")
+                        self.next_learner()
+                        place()
+                        renderer.reset()
+                        redraw = True
+                    elif menu_colors_button.is_clicked(event.pos):
+                        self.play_sound("click")
                         self.game_mode = "options"
                     elif menu_options_button.is_clicked(event.pos):
-                        self.click_sound.play()
+                        self.play_sound("click")
                         self.game_mode = "options"
                     elif menu_quit_button.is_clicked(event.pos):
-                        self.click_sound.play()
+                        self.play_sound("click")
                         self.running = False
 
     def run_options(self):
         """Handles the words mode loop."""
-        # Prompt text lower left corner
-        prompt_text = self.text_font.render("Hint: Adjust the goal of the game.", True, WHITE)
-        prompt_rect = prompt_text.get_rect(bottomleft=(20, self.screen_height - 20))
-        options_back_button = Button(self.screen_width - 200 - 20, 20, "Back", 200, 50, DARK_RED)
+        options_back_button = Button(0, 0, "", color=DARK_RED)
 
         # --- Start of game mode init section ---
 
-        ok_button = Button(self.screen_width // 2 - 100, self.screen_height * 4 // 5, "OK", 200, 50, "darkgreen")
-        opt_rect = {}
-        force_opt_rect = {}
-        opt_size = 50
-        i = 0
-        for acolor in self.COLOR_NAMES:
-            opt_rect[acolor] = pygame.Rect((self.screen_width - opt_size * 1.25 * len(self.COLOR_NAMES)) // 2 + (i * opt_size * 1.25), self.screen_height * 2 // 5, opt_size, opt_size)
-            force_opt_rect[acolor] = pygame.Rect((self.screen_width - opt_size * 1.25 * len(self.COLOR_NAMES)) // 2 + (i * opt_size * 1.25), self.screen_height * 3 // 5, opt_size, opt_size)
-            i += 1
+        settings_on_entry = self.settings()
+        ok_button = Button(0, 0, "", color="darkgreen")
+        plus_button = Button(0, 0, "+", color="darkred")
+        minus_button = Button(0, 0, "-", color="darkred")
+        difficulty_button = Button(0, 0, "", color=DARK_BLUE)
+        prev_page_button = Button(0, 0, "<", color="darkred")
+        next_page_button = Button(0, 0, ">", color="darkred")
+        language_button = Button(0, 0, "", color=DARK_BLUE)
+
+        def place():
+            """Places the buttons and builds the checkbox grids for the current resolution and language."""
+            nonlocal layout, prompt_text, prompt_rect, opt_grid, force_grid
+            # Prompt text lower left corner
+            prompt_text = text_cache.render(self.text_font, self.locale.label("options_hint"), True, WHITE)
+            options_back_button.text = self.locale.label("back")
+            ok_button.text = self.locale.label("ok")
+            language_button.text = self.locale.label("language", language=self.locale.name)
+            layout = self.layout("options")
+            prompt_rect = prompt_text.get_rect(bottomleft=layout["prompt"].topleft)
+            for button, name in ((options_back_button, "back"), (ok_button, "ok"), (plus_button, "plus"), (minus_button, "minus"),
+                                 (difficulty_button, "difficulty"), (prev_page_button, "page_prev"), (next_page_button, "page_next"),
+                                 (language_button, "language")):
+                button.place(layout[name])
+            # Checkbox grids: available colors between the 2/5 and 3/5 labels, forced color below, paged together
+            rows = max(1, min(layout["available"].height, layout["force"].height) // PALETTE_CELL_PITCH)
+            opt_grid = PaletteGrid(self.COLOR_NAMES, layout["available"], rows=rows)
+            force_grid = PaletteGrid(self.COLOR_NAMES, layout["force"], rows=rows)
+            show_page(self.palette_page)
+
+        def show_page(page):
+            opt_grid.set_page(page)
+            force_grid.set_page(page)
+            self.palette_page = opt_grid.page
+            self.ui = {"back": options_back_button.rect, "ok": ok_button.rect, "plus": plus_button.rect, "minus": minus_button.rect,
+                       "difficulty": difficulty_button.rect, "language": language_button.rect}
+            if opt_grid.pages > 1:
+                self.ui.update({"page_prev": prev_page_button.rect, "page_next": next_page_button.rect})
+            self.ui.update({f"toggle.{acolor}": rect for acolor, rect in opt_grid.visible()})
+            self.ui.update({f"force.{acolor}": rect for acolor, rect in force_grid.visible()})
+
+        layout = prompt_text = prompt_rect = opt_grid = force_grid = None
+        place()
+
+        def draw_static(surface):
+            surface.blit(prompt_text, prompt_rect)
+            options_back_button.draw(surface, self.button_font)
+            language_button.draw(surface, self.button_font)
+
+            # Section 0: Options title
+            title_text = text_cache.render(self.normal_font, self.locale.label("options"), True, (0, 0, 0))
+            surface.blit(title_text, title_text.get_rect(midtop=layout["title"].topleft))
+
+            # Section 1. Option for number of choices, with "+" and "-" buttons
+            num_choices_prompt_text = text_cache.render(self.button_font, self.locale.label("num_choices"), True, "white")
+            surface.blit(num_choices_prompt_text, num_choices_prompt_text.get_rect(midtop=layout["choices_label"].topleft))
+            plus_button.draw(surface, self.button_font)
+            minus_button.draw(surface, self.button_font)
+
+            # Section 2. Option for available colors
+            available_choices_text = text_cache.render(self.button_font, self.locale.label("available"), True, "white")
+            surface.blit(available_choices_text, available_choices_text.get_rect(midtop=layout["available_label"].topleft))
+            # Draw checkbox outlines for the visible page only
+            for acolor, rect in opt_grid.visible():
+                pygame.draw.rect(surface, self.color_items[acolor]["value"], rect, 4)
+            for acolor, rect in force_grid.visible():
+                pygame.draw.rect(surface, self.color_items[acolor]["value"], rect, 4)
+            if opt_grid.pages > 1:
+                prev_page_button.draw(surface, self.button_font)
+                next_page_button.draw(surface, self.button_font)
+                page_text = text_cache.render(self.text_font, self.locale.label("page", page=opt_grid.page + 1, pages=opt_grid.pages), True, "white")
+                surface.blit(page_text, page_text.get_rect(midtop=layout["page_label"].topleft))
+
+            # Section 3: Option to force only 1 possible right color
+            only_choice_text = text_cache.render(self.button_font, self.locale.label("force"), True, "white")
+            surface.blit(only_choice_text, only_choice_text.get_rect(midtop=layout["force_label"].topleft))
+
+            # Section 4: Draw "OK" button
+            ok_button.draw(surface, self.button_font)
+
+        renderer = DirtyRenderer(self.screen, draw_static)
+        redraw = True
 
         # --- End of game mode init section ---
 
         while self.game_mode == "options" and self.running:
-            self.clock.tick(60)
-            self.screen.fill(DARK_GRAY)
-            self.screen.blit(prompt_text, prompt_rect)
-            options_back_button.draw(self.screen, self.button_font)
 
             # --- Start of frame creation ---
 
-            # Section 0: Options title
-            title_text = self.normal_font.render("Options", True, (0, 0, 0))
-            self.screen.blit(title_text, (self.screen_width // 2 - title_text.get_width() // 2, 50))
-
-            # Section 1. Option for number of choices
-            num_choices_prompt_text = self.button_font.render(f"Number of choices: ", True, "white")
-            self.screen.blit(num_choices_prompt_text, (self.screen_width // 2 - num_choices_prompt_text.get_width() // 2, self.screen_height * 1 // 5 - 50))
-            num_choices_text = self.button_font.render(f"{self.num_choices}", True, "darkred")
-            self.screen.blit(num_choices_text, (self.screen_width // 2 - num_choices_text.get_width() // 2, self.screen_height * 1 // 5 + 10))
-
-            # Draw "+" button
-            plus_button = Button(self.screen_width // 2 - 25 + 50, self.screen_height * 1 // 5, "+", 50, 50, "darkred")
-            plus_button.draw(self.screen, self.button_font)
-            # Draw "-" button
-            minus_button = Button(self.screen_width // 2 - 25 - 50, self.screen_height * 1 // 5, "-", 50, 50, "darkred")
-            minus_button.draw(self.screen, self.button_font)
-
-            # Section 2. Option for available colors
-            available_choices_text = self.button_font.render("Available choices: ", True, "white")
-            self.screen.blit(available_choices_text, (self.screen_width // 2 - available_choices_text.get_width() // 2, self.screen_height * 2 // 5 - 50))
-            # Draw option checkboxes
-            for acolor in self.COLOR_NAMES:
-                pygame.draw.rect(self.screen, acolor, opt_rect[acolor], 4)
-                if self.color_items[acolor]["toggle"]:
-                    # draw smaller box
-                    pygame.draw.rect(self.screen, acolor, opt_rect[acolor].inflate(-10, -10))
-                pygame.draw.rect(self.screen, acolor, force_opt_rect[acolor], 4)
-                if self.force_correct_color == acolor:
-                    # draw smaller box
-                    pygame.draw.rect(self.screen, acolor, force_opt_rect[acolor].inflate(-10, -10))
+            if redraw:
+                renderer.begin()
+                num_choices_text = text_cache.render(self.button_font, f"{self.num_choices}", True, "darkred")
+                renderer.blit(num_choices_text, num_choices_text.get_rect(midtop=layout["num_choices"].topleft))
+                difficulty_button.text = self.locale.label("difficulty", difficulty=self.locale.label(self.difficulty))
+                renderer.button(difficulty_button, self.button_font)
 
-            # Section 3: Option to force only 1 possible right color
-            only_choice_text = self.button_font.render("Force choice: ", True, "white")
-            self.screen.blit(only_choice_text, (self.screen_width // 2 - only_choice_text.get_width() // 2, self.screen_height * 3 // 5 - 50))
+                # Fill the checked boxes on the visible page
+                for acolor, rect in opt_grid.visible():
+                    if self.color_items[acolor]["toggle"]:
+                        renderer.rect(self.color_items[acolor]["value"], rect.inflate(-10, -10))
+                for acolor, rect in force_grid.visible():
+                    if self.force_correct_color == acolor:
+                        renderer.rect(self.color_items[acolor]["value"], rect.inflate(-10, -10))
 
-            # Section 4: Draw "OK" button
-            ok_button.draw(self.screen, self.button_font)
+                renderer.end()
+                redraw = False
 
             # --- End of frame creation ---
 
-            pygame.display.flip()
+            self.play_ready_speech()
 
             # --- Event handlers ---
-            for event in pygame.event.get():
+            for event in self.events("options", busy=redraw):
                 if event.type == pygame.QUIT:
                     self.running = False
+                elif event.type == SCREEN_CHANGED_EVENT:
+                    # A reloaded config or asset changed the screen
+                    place()
+                    renderer.reset(self.screen)
+                    redraw = True
                 elif event.type == pygame.KEYDOWN:
                     # Toggle between fullscreen and windowed modes
                     if event.key == pygame.K_RETURN and pygame.key.get_mods() & pygame.KMOD_ALT:
-                        self.fullscreen, self.screen = toggle_fullscreen(self.screen, self.screen_width, self.screen_height, self.fullscreen)
+                        self.toggle_fullscreen()
+                        place()
+                        renderer.reset(self.screen)
+                        redraw = True
+                    elif event.key == pygame.K_F3:
+                        # Toggle the frame profiler overlay
+                        profiler.toggle_overlay()
+                        renderer.reset()
+                        redraw = True
                     elif event.key == pygame.K_ESCAPE:
                             self.game_mode = "menu"
+                elif event.type == pygame.MOUSEWHEEL and opt_grid.pages > 1:
+                    # Scroll through the palette pages
+                    show_page(opt_grid.page - event.y)
+                    renderer.reset()
+                    redraw = True
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     x, y = event.pos
+                    redraw = True
+                    if opt_grid.pages > 1 and (prev_page_button.is_clicked(event.pos) or next_page_button.is_clicked(event.pos)):
+                        self.play_sound("click")
+                        show_page(opt_grid.page + (1 if next_page_button.is_clicked(event.pos) else -1))
+                        renderer.reset()
                     if options_back_button.is_clicked(event.pos):
-                        self.click_sound.play()
+                        self.play_sound("click")
                         self.game_mode = "menu"
+                    if difficulty_button.is_clicked(event.pos):
+                        # Cycle how similar the distractors are to the target color
+                        self.play_sound("click")
+                        self.difficulty = DIFFICULTY_LEVELS[(DIFFICULTY_LEVELS.index(self.difficulty) + 1) % len(DIFFICULTY_LEVELS)]
+                    if language_button.is_clicked(event.pos):
+                        # The new language is warmed up in the background; the old one is let go
+                        self.play_sound("click")
+                        self.next_locale()
+                        place()
+                        renderer.reset()
                     if ok_button.rect.collidepoint(x, y):
                         # Return to the title screen
-                        self.click_sound.play()
+                        self.play_sound("click")
                         self.game_mode = "colors"
                         # return
                     if plus_button.rect.collidepoint(x, y):
                         # Increase the number of choices
-                        self.click_sound.play()
-                        self.num_choices = min(self.num_choices + 1, self.max_num_choices)
+                        self.play_sound("click")
+                        self.num_choices = min(self.num_choices + 1, self.max_num_choices, self.num_toggled)
                     if minus_button.rect.collidepoint(x, y):
                         # Decrease the number of choices
-                        self.click_sound.play()
+                        self.play_sound("click")
                         self.num_choices = max(self.num_choices - 1, self.min_num_choices)
-                    for acolor in self.COLOR_NAMES:
-                        if opt_rect[acolor].collidepoint(x, y):
-                            self.click_sound.play()
-                            self.color_items[acolor]["toggle"] = not self.color_items[acolor]["toggle"]
-                            num_available_colors = sum(1 for item in self.color_items.values() if item["toggle"])
-                            if num_available_colors < self.num_choices:
-                                self.color_items[acolor]["toggle"] = not self.color_items[acolor]["toggle"]
-                            if not self.color_items[acolor]["toggle"] and self.force_correct_color == acolor:
-                                self.force_correct_color = None
-                        if force_opt_rect[acolor].collidepoint(x, y):
-                            self.click_sound.play()
-                            if self.force_correct_color == acolor:
-                                self.force_correct_color = None
-                            elif self.color_items[acolor]["toggle"]:
-                                self.force_correct_color = acolor
-
-    def generate_square_positions(self, num_choices):
-        positions = []
-        # Dynamic layout for numbers of choices
-        spacing = self.screen_width // num_choices - self.square_size
-        total_width = num_choices * self.square_size + (num_choices - 1) * spacing
-        start_x = (self.screen_width - total_width) // 2
-        start_y = self.screen_height // 2 - self.square_size
-        for i in range(num_choices):
-            x = start_x + i * (self.square_size + spacing)
-            y = start_y
-            positions.append((x, y))
-        return positions
+                    acolor = opt_grid.hit(event.pos)
+                    if acolor is not None:
+                        self.play_sound("click")
+                        # Never leave fewer colors than squares to fill
+                        if not self.color_items[acolor]["toggle"] or self.num_toggled > self.num_choices:
+                            self.set_toggle(acolor, not self.color_items[acolor]["toggle"])
+                        if not self.color_items[acolor]["toggle"] and self.force_correct_color == acolor:
+                            self.force_correct_color = None
+                    acolor = force_grid.hit(event.pos)
+                    if acolor is not None:
+                        self.play_sound("click")
+                        if self.force_correct_color == acolor:
+                            self.force_correct_color = None
+                        elif self.color_items[acolor]["toggle"]:
+                            self.force_correct_color = acolor
+
+        # All edits made on this screen go to the profile store in one transaction
+        if self.settings() != settings_on_entry:
+            self.profiles.save(self.learner, settings=self.settings())
+            if self.sync is not None:
+                self.sync.send("profile", dict(self.settings(), learner=self.learner))
+
+        # Keep only what the screens actually use
+        in_play = self.assets_in_play()
+        self.assets.unload(in_play)
+        self.assets.warm_up(in_play)
 
     # Function to generate squares with only one correct choice
-    def generate_squares(self, num_choices):
-        really_available_colors = [c for c in self.COLOR_NAMES if self.color_items[c]["toggle"]]
-        if self.force_correct_color:
-            correct_color = self.force_correct_color
+    def generate_squares(self, num_choices, target):
+        names = self.catalog.names
+        if self.difficulty == "adaptive":
+            # Practice the pairs this learner confuses most
+            distractors = self.tutor.pick(target, num_choices - 1, self.toggled_mask, self.rng)
         else:
-            correct_color = random.choice(really_available_colors)
-        # Ensure the correct color is only present once
-        incorrect_colors = random.sample([c for c in really_available_colors if c != correct_color], num_choices - 1)  # Pick incorrect colors
-        square_colors = incorrect_colors + [correct_color]  # Combine incorrect and correct colors
+            # Ensure the correct color is only present once; distractors follow the difficulty level
+            distractors = self.catalog.distractors(target, num_choices - 1, DIFFICULTY_DELTA_E[self.difficulty], self.toggled_mask, self.rng)
+        square_colors = [names[i] for i in distractors] + [names[target]]  # Combine incorrect and correct colors
         random.shuffle(square_colors)  # Shuffle to randomize positions
-        return correct_color, square_colors
+        return names[target], square_colors
 
     def run_colors(self):
         """Handles the words mode loop."""
         # Back button upper right corner
-        colors_back_button = Button(self.screen_width - 200 - 20, 20, "Back", 200, 50, DARK_RED)
+        colors_back_button = Button(0, 0, self.locale.label("back"), color=DARK_RED)
 
         # Prompt text lower left corner
-        prompt_text = self.text_font.render("Hint: Tap or click on a color square to answer.", True, WHITE)
-        prompt_rect = prompt_text.get_rect(bottomleft=(20, self.screen_height - 20))
+        prompt_text = text_cache.render(self.text_font, self.locale.label("colors_hint"), True, WHITE)
 
         # --- Start of game mode init section ---
 
         # new game variables
         question_num = 0
         real_score = 0
-        target_question_num = 10
+        target_question_num = ROUND_QUESTIONS
         wrong_answer = False
         round_over = False
         new_question = True
         result = None
         show_next_button = False
-        highlight_x, highlight_y = 0, 0
-
-        # Initialize the first question
-        square_positions = self.generate_square_positions(self.num_choices)
-        correct_color, square_colors = self.generate_squares(self.num_choices)
+        highlight = 0 # Index of the last tapped square
+        game_over_at = None # Ticks at which the game over screen replaces the last answer
+        round_id = uuid.uuid4().hex
+        attempt = 0
+        question_shown_at = time.perf_counter()
+
+        # Deal the round; the first questions are built now, the rest while the learner answers
+        self.deck = QuestionDeck(self.build_questions(target_question_num))
+        self.deck.refill()
+        question = self.deck.take()
+        correct_color, square_colors = question["target"], question["colors"]
 
         # Button definitions
-        next_button = Button(self.screen_width - 200 - 20, self.screen_height - 50 - 20, "Next", 200, 50)
-        new_game_button = Button(self.screen_width // 2 - 200 - 10, self.screen_height // 2 + 50, "New Game", 200, 50)
-        exit_game_button = Button(self.screen_width // 2 + 10, self.screen_height // 2 + 50, "Exit Game", 200, 50, "darkred")
+        next_button = Button(0, 0, self.locale.label("next"))
+        new_game_button = Button(0, 0, self.locale.label("new_game"))
+        exit_game_button = Button(0, 0, self.locale.label("exit_game"), color="darkred")
+
+        def place():
+            nonlocal layout, prompt_rect
+            layout = self.layout("colors", num_choices=self.num_choices, max_choices=self.max_num_choices)
+            prompt_rect = prompt_text.get_rect(bottomleft=layout["prompt"].topleft)
+            colors_back_button.place(layout["back"])
+            next_button.place(layout["next"])
+            new_game_button.place(layout["new_game"])
+            exit_game_button.place(layout["exit"])
+            self.ui = {"back": colors_back_button.rect, "next": next_button.rect}
+
+        layout = prompt_rect = None
+        place()
+
+        def draw_static(surface):
+            surface.blit(prompt_text, prompt_rect)
+            colors_back_button.draw(surface, self.button_font)
+
+        def draw_game_over():
+            """Draws the game over screen at the current resolution."""
+            self.screen.fill((128, 128, 128))
+            final_score_text = text_cache.render(self.score_font, self.locale.label("final_score", score=round(real_score / 10 * 100)), True, "black")
+            self.screen.blit(final_score_text, final_score_text.get_rect(midtop=layout["final_score"].topleft))
+            well_done_text = text_cache.render(self.normal_font, self.locale.label("well_done"), True, "gold")
+            self.screen.blit(well_done_text, well_done_text.get_rect(midtop=layout["well_done"].topleft))
+            new_game_button.draw(self.screen, self.button_font)
+            exit_game_button.draw(self.screen, self.button_font)
+            if profiler.overlay:
+                profiler.draw_overlay(self.screen)
+            pygame.display.flip()
+            self.ui = {"new_game": new_game_button.rect, "exit": exit_game_button.rect}
 
+        renderer = DirtyRenderer(self.screen, draw_static)
+        redraw = True
 
         # --- End of game mode init section ---
 
         while self.game_mode == "colors" and self.running:
-            self.clock.tick(60)
-            self.screen.fill(DARK_GRAY)
-            self.screen.blit(prompt_text, prompt_rect)
-            colors_back_button.draw(self.screen, self.button_font)
+
+            # --- Event handlers ---
+            # Input is drained before drawing, so a tap's feedback goes out in the frame drawn right after it
+            timeout_ms = game_over_at - pygame.time.get_ticks() if round_over else IDLE_WAIT_MS
+            for event in self.events("colors", busy=redraw, timeout_ms=timeout_ms):
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type == SCREEN_CHANGED_EVENT:
+                    # A reloaded config or asset changed the screen
+                    place()
+                    renderer.reset(self.screen)
+                    redraw = True
+                elif event.type == pygame.KEYDOWN:
+                    # Toggle between fullscreen and windowed modes
+                    if event.key == pygame.K_RETURN and pygame.key.get_mods() & pygame.KMOD_ALT:
+                        self.toggle_fullscreen()
+                        place()
+                        renderer.reset(self.screen)
+                        redraw = True
+                    elif event.key == pygame.K_F3:
+                        # Toggle the frame profiler overlay
+                        profiler.toggle_overlay()
+                        renderer.reset()
+                        redraw = True
+                    elif event.key == pygame.K_ESCAPE:
+                        self.game_mode = "menu"
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    redraw = True
+                    if colors_back_button.is_clicked(event.pos):
+                        self.play_sound("click")
+                        self.game_mode = "menu"
+                    x, y = event.pos
+                    if show_next_button and not round_over and next_button.rect.collidepoint(x, y):
+                        self.play_sound("click")
+                        show_next_button = False
+                        wrong_answer = False
+                        result = None
+                        question = self.deck.take()
+                        correct_color, square_colors = question["target"], question["colors"]
+                        new_question = True
+                    elif not show_next_button:
+                        for i, rect in enumerate(layout["squares"]):
+                            if rect.collidepoint(x, y):
+                                # Highlight the tapped square on the next draw
+                                highlight = i
+                                tap_latency.tapped(event.at)
+                                asked_question = question_num + 1 # As shown on screen
+                                index = self.catalog.index
+                                self.tutor.record(index[correct_color], index[square_colors[i]], [index[c] for c in square_colors], not wrong_answer)
+                                if square_colors[i] == correct_color:
+                                    result = "right"
+                                    self.play_speech(random.choice(self.right_sounds), "feedback")
+                                    show_next_button = True
+                                    question_num += 1  # Increase score
+                                    if not wrong_answer:
+                                        real_score += 1 
+                                    if question_num >= target_question_num:
+                                        round_over = True
+                                        game_over_at = pygame.time.get_ticks() + GAME_OVER_DELAY_MS
+                                else:
+                                    result = "wrong"
+                                    self.play_speech(random.choice(self.wrong_sounds), "feedback")
+                                    show_next_button = False
+                                    wrong_answer = True
+                                # Logged after the feedback has been started
+                                attempt += 1
+                                record = {
+                                    "learner": self.learner,
+                                    "round": round_id,
+                                    "question": asked_question,
+                                    "target": correct_color,
+                                    "tapped": square_colors[i],
+                                    "correct": square_colors[i] == correct_color,
+                                    "attempt": attempt,
+                                    "response_ms": round(1000 * (time.perf_counter() - question_shown_at), 1),
+                                    "choices": len(square_colors),
+                                }
+                                self.answer_log.append(record)
+                                if self.sync is not None:
+                                    self.sync.send("answer", record)
+            if self.game_mode != "colors" or not self.running:
+                break
 
             # --- Start of frame creation ---
-            # Display the score
-            score_text = self.score_font.render(f"Question {question_num + 1: >2}", True, (0, 0, 0))
-            self.screen.blit(score_text, (20, 20))
-
-            # Display the color name to select
-            game_text = self.normal_font.render(f"Find Color {correct_color.capitalize()}", True, "black")
-            game_rect = pygame.Rect(self.screen_width // 2 - game_text.get_width() // 2 - 2, 50 - 2, game_text.get_width() + 4, game_text.get_height() + 4)
-            pygame.draw.rect(self.screen, "gold", game_rect.inflate(0, 0))
-            self.screen.blit(game_text, (self.screen_width // 2 - game_text.get_width() // 2, 50))
-
-            # Draw the squares
-            for i, pos in enumerate(square_positions):
-                pygame.draw.rect(self.screen, self.color_items[square_colors[i]]["value"], (*pos, self.square_size, self.square_size))
-
-            # Display result
-            if result is not None:
-                pygame.draw.rect(self.screen, "brown", (highlight_x - 10, highlight_y - 10, self.square_size + 20, self.square_size + 20),5)    
-                result_text = self.big_font.render(result, True, pygame.Color("green" if result == "RIGHT !" else "red"))
-                self.screen.blit(result_text, (self.screen_width // 2 - result_text.get_width() // 2, self.screen_height - self.screen_height // 9))
-                # Display emoji based on result
-                if result == "RIGHT !":
-                    self.screen.blit(self.happy_face, (self.screen_width // 2 - 100, self.screen_height // 2 + 50))
-                else:
-                    self.screen.blit(self.sad_face, (self.screen_width // 2 - 100, self.screen_height // 2 + 50))
-
-            # Draw the "Next" button if the round is over
-            if show_next_button and not round_over:
-                next_button.draw(self.screen, self.button_font)
+            if redraw:
+                renderer.begin()
+
+                # Display the score
+                score_text = text_cache.render(self.score_font, self.locale.label("question", number=question_num + 1), True, (0, 0, 0))
+                renderer.blit(score_text, layout["score"])
+
+                # Display the color name to select
+                game_text = question["label"]
+                game_rect = game_text.get_rect(midtop=layout["question"].topleft)
+                renderer.rect("gold", game_rect.inflate(4, 4))
+                renderer.blit(game_text, game_rect)
+
+                # Draw the squares
+                self.question = {"target": correct_color, "squares": {}}
+                for acolor, rect in zip(square_colors, layout["squares"]):
+                    self.question["squares"][acolor] = renderer.rect(self.color_items[acolor]["value"], rect)
+
+                # Display result
+                if result is not None:
+                    renderer.rect("brown", layout["squares"][highlight].inflate(20, 20), 5)
+                    result_text = text_cache.render(self.big_font, self.locale.label(result), True, "green" if result == "right" else "red")
+                    renderer.blit(result_text, result_text.get_rect(midtop=layout["result"].topleft))
+                    # Display emoji based on result
+                    face = self.assets.image("happy_face" if result == "right" else "sad_face")
+                    if face is not None:
+                        renderer.blit(face, face.get_rect(midtop=layout["face"].topleft))
+
+                # Draw the "Next" button if the round is over
+                if show_next_button and not round_over:
+                    renderer.button(next_button, self.button_font)
+
+                renderer.end()
+                tap_latency.reached("frame")
+                redraw = False
 
             # Play voice prompt
             if new_question:
                 new_question = False
-                question_prompt = random.choice([f"Find {correct_color}!", f"Where is {correct_color}?", f"Point to {correct_color}!"])
-                generate_speech_sound(question_prompt).play()
+                attempt = 0
+                question_shown_at = time.perf_counter()
+                self.audio.advance() # The previous question's prompt is stale
+                self.play_speech(question["speech"])
+                # Build the next questions while the learner is answering
+                self.deck.refill()
                 # pygame.time.delay(250)
                 # self.title_sound.play() 
                 # pygame.time.delay(500)
-                # self.color_items[correct_color]["sound"].play() 
+                # self.play_sound(correct_color)
+            self.play_ready_speech()
 
-            if round_over:
+            if round_over and pygame.time.get_ticks() >= game_over_at:
                 # Display the game over screen
-                pygame.time.delay(1000)
-                self.screen.fill((128, 128, 128))
-                final_score_text = self.score_font.render(f"Final Score: {round(real_score / 10 * 100)} %", True, pygame.Color("black"))
-                self.screen.blit(final_score_text, (self.screen_width // 2 - final_score_text.get_width() // 2, self.screen_height * 1 // 5))
-                well_done_text = self.normal_font.render("Well Done!", True, pygame.color.Color("gold"))
-                self.screen.blit(well_done_text, (self.screen_width // 2 - well_done_text.get_width() // 2, self.screen_height // 2 - 50))
-                self.well_done_sound.play()
-                new_game_button.draw(self.screen, self.button_font)
-                exit_game_button.draw(self.screen, self.button_font)
-                pygame.display.flip()
+                self.play_speech(self.well_done_sound, "well_done")
+                draw_game_over()
+                renderer.reset()
+                redraw = True
 
                 # Event handling for game over screen
                 round_over_waiting = True
                 while round_over_waiting:
-                    for event in pygame.event.get():
+                    self.play_ready_speech()
+                    for event in self.events("game_over"):
                         if event.type == pygame.QUIT:
                             self.running = False
+                            round_over_waiting = False
+                        elif event.type == SCREEN_CHANGED_EVENT:
+                            # A reloaded config or asset changed the screen
+                            place()
+                            renderer.reset(self.screen)
+                            draw_game_over()
+                        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                            # Toggle the frame profiler overlay
+                            profiler.toggle_overlay()
+                            draw_game_over()
                         elif event.type == pygame.MOUSEBUTTONDOWN:
                             x, y = event.pos
                             if new_game_button.rect.collidepoint(x, y):
                                 # Reset the game
-                                self.click_sound.play()
+                                self.play_sound("click")
                                 self.result = None
                                 question_num = 0
                                 real_score = 0 
+                                round_id = uuid.uuid4().hex
                                 round_over = False
-                                self.game_mode = "options"
-                                correct_color, square_colors = self.generate_squares(self.num_choices)
+                                self.game_mode = "options" # The next round is dealt when this screen opens again
                                 show_next_button = False
                                 round_over_waiting = False
+                                self.ui = {"back": colors_back_button.rect, "next": next_button.rect}
                             elif exit_game_button.rect.collidepoint(x, y):
-                                self.click_sound.play()
+                                self.play_sound("click")
                                 self.running = False  # Exit the game
                                 round_over_waiting = False
                                 
             # --- End of frame creation ---
 
-            # --- Event handlers ---
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    # Toggle between fullscreen and windowed modes
-                    if event.key == pygame.K_RETURN and pygame.key.get_mods() & pygame.KMOD_ALT:
-                        self.fullscreen, self.screen = toggle_fullscreen(self.screen, self.screen_width, self.screen_height, self.fullscreen)
-                    elif event.key == pygame.K_ESCAPE:
-                        self.game_mode = "menu"
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if colors_back_button.is_clicked(event.pos):
-                        self.click_sound.play()
-                        self.game_mode = "menu"
-                    x, y = event.pos
-                    if show_next_button and next_button.rect.collidepoint(x, y):
-                        self.click_sound.play()
-                        show_next_button = False
-                        wrong_answer = False
-                        result = None
-                        correct_color, square_colors = self.generate_squares(self.num_choices)
-                        new_question = True
-                    elif not show_next_button:
-                        for i, pos in enumerate(square_positions):
-                            if pos[0] <= x <= pos[0] + self.square_size and pos[1] <= y <= pos[1] + self.square_size:
-                                # set highlight pos for draw_screen()
-                                highlight_x, highlight_y = pos
-                                if square_colors[i] == correct_color:
-                                    result = "RIGHT !"
-                                    random.choice(self.right_sounds).play()
-                                    show_next_button = True
-                                    question_num += 1  # Increase score
-                                    if not wrong_answer:
-                                        real_score += 1 
-                                    if question_num >= target_question_num:
-                                        round_over = True
-                                    else:
-                                        next_button.draw(self.screen, self.button_font)
-                                else:
-                                    result = "WRONG !"
-                                    random.choice(self.wrong_sounds).play()
-                                    show_next_button = False
-                                    wrong_answer = True
-
-            pygame.display.flip()
+        # The tutor has learned from every tap of this round; store it once on leaving
+        self.profiles.save(self.learner, settings=self.settings(), tutor=self.tutor.to_bytes())
+
+startup.record("import", STARTED_AT, time.perf_counter())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="The Learning Colors Game")
+    parser.add_argument("--speech-backend", choices=["auto", "bank", "gtts"], default="auto",
+                        help="where speech comes from: the offline voice bank, gTTS, or the bank with gTTS fallback")
+    parser.add_argument("--prerender", action="store_true",
+                        help="render every phrase the game can speak into the voice bank and exit")
+    parser.add_argument("--bank", default=VOICE_BANK_DIR, help="voice bank directory")
+    parser.add_argument("--lang", default=DEFAULT_LOCALE, choices=available_locales(),
+                        help="language to play until a learner's saved language replaces it, and to pre-render")
+    parser.add_argument("--jobs", type=int, default=None, help="pre-render worker processes")
+    parser.add_argument("--force", action="store_true", help="re-render phrases already in the bank")
+    parser.add_argument("--build-pack", action="store_true", help="pack the assets in the manifest into one file and exit")
+    parser.add_argument("--pack", default=ASSET_PACK, help="asset pack to build or play from (loose files are used if it is missing)")
+    parser.add_argument("--pack-codec", choices=["auto", "ogg", "zlib"], default="auto",
+                        help="how sounds are compressed: Ogg Vorbis needs oggenc or ffmpeg, auto falls back to zlib")
+    parser.add_argument("--asset-report", action="store_true", help="print per-asset load times on exit")
+    parser.add_argument("--power-report", action="store_true", help="print wakeups per second and CPU time per mode on exit")
+    parser.add_argument("--profile-startup", action="store_true", help="print a timeline of the startup stages on exit")
+    parser.add_argument("--latency-report", action="store_true", help="print tap-to-feedback latency percentiles and histograms on exit")
+    parser.add_argument("--audio-report", action="store_true", help="print speech queue latency and dropped clips on exit")
+    parser.add_argument("--profile", action="store_true", help="time every frame phase (F3 toggles the overlay)")
+    parser.add_argument("--profile-log", help="stream per-frame profiler records to a .csv or JSON lines file")
+    parser.add_argument("--config", default=CONFIG_FILE_PATH, help="configuration file, reloaded when it changes")
+    parser.add_argument("--no-watch", action="store_true", help="do not reload the config, color catalog and assets when their files change")
+    parser.add_argument("--profile-db", default=PROFILE_DB_PATH, help="SQLite file holding the learner profiles")
+    parser.add_argument("--sync", metavar="HOST[:PORT]", help="push answers and profile changes to a classroom server")
+    parser.add_argument("--station", help="name of this station on the classroom server (default: host name)")
+    parser.add_argument("--add-learner", action="append", default=[], metavar="NAME", help="create a learner profile (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.prerender:
+        return 0 if prerender_voice_bank(args.bank, args.lang, args.jobs, args.force) else 1
+    if args.build_pack:
+        return 0 if build_asset_pack(ASSET_MANIFEST, args.pack, args.pack_codec) else 1
+
+    global speech_backends
+    names = SPEECH_BACKENDS if args.speech_backend == "auto" else [args.speech_backend]
+    speech_backends = make_speech_backends(names, args.bank)
+    if args.profile or args.profile_log:
+        profiler.enable(args.profile_log)
+    if args.add_learner:
+        profiles = ProfileStore(args.profile_db)
+        for name in args.add_learner:
+            profiles.add(name)
+        profiles.close()
+    sync = SyncClient(args.sync, args.station) if args.sync else None
+    game = MainGame(profile_db=args.profile_db, sync=sync, asset_pack=args.pack, config_path=args.config, watch=not args.no_watch,
+                    locale=args.lang)
+    game.run()
+    if args.asset_report:
+        print("\n".join(game.assets.report()))
+    if args.power_report:
+        print("\n".join(game.scheduler.report()))
+    if args.audio_report:
+        print("\n".join(game.audio.report()))
+    if args.profile_startup:
+        print("\n".join(startup.report()))
+    if args.latency_report:
+        print("\n".join(tap_latency.report()))
+    return 0
 
 if __name__ == '__main__':
-    game = MainGame()
-    game.run()
+    sys.exit(main())
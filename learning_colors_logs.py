@@ -0,0 +1,135 @@
+""" Streaming aggregation of Learning Colors Game answer logs """
+
+# --- import modules ---
+import os
+import sys
+import gzip
+import json
+import argparse
+
+# --- Global Constants and Configuration ---
+LATENCY_BUCKETS_MS = [250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, 30000] # Last bucket is open-ended
+LOG_SUFFIXES = (".jsonl", ".jsonl.gz")
+
+# --- Helper Functions ---
+def iter_log_files(paths):
+    """Yields every answer log under paths, in sorted order."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    if name.endswith(LOG_SUFFIXES):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+def iter_records(path, stats):
+    """Yields the records of one log file line by line, skipping lines that are not JSON objects.
+
+    Files that cannot be read to the end (truncated or corrupt archives) keep the records read so far.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    try:
+        with opener(path, "rb") as log_file:
+            for line in log_file:
+                try:
+                    record = json.loads(line.decode("utf-8")) # Invalid UTF-8 is a ValueError too
+                except ValueError:
+                    stats["bad_lines"] += 1
+                    continue
+                if not isinstance(record, dict):
+                    stats["bad_lines"] += 1
+                    continue
+                yield record
+    except (OSError, EOFError) as e:
+        stats["bad_files"] += 1
+        print(f"Error reading {path}: {e}", file=sys.stderr)
+
+class LearnerSummary:
+    """Fixed-size running totals for one learner."""
+    def __init__(self):
+        self.taps = 0
+        self.questions = 0
+        self.first_try_correct = 0
+        self.latency_count = 0
+        self.latency_total = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.colors = {} # target -> [questions, first try correct]
+        self.devices = set()
+
+    def add(self, record):
+        self.taps += 1
+        self.devices.add(str(record.get("device", "?")))
+        if record.get("attempt") != 1:
+            return
+        # The first tap of a question decides accuracy and response time
+        self.questions += 1
+        correct = bool(record.get("correct"))
+        self.first_try_correct += correct
+        color = self.colors.setdefault(str(record.get("target", "?")), [0, 0])
+        color[0] += 1
+        color[1] += correct
+        latency = record.get("response_ms")
+        if isinstance(latency, (int, float)):
+            self.latency_count += 1
+            self.latency_total += latency
+            bucket = 0
+            while bucket < len(LATENCY_BUCKETS_MS) and latency > LATENCY_BUCKETS_MS[bucket]:
+                bucket += 1
+            self.latency_buckets[bucket] += 1
+
+    def latency_percentile(self, percent):
+        """Returns the upper bound of the bucket holding the given percentile, None if open-ended."""
+        if not self.latency_count:
+            return None
+        wanted = self.latency_count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.latency_buckets):
+            seen += count
+            if seen >= wanted:
+                return LATENCY_BUCKETS_MS[bucket] if bucket < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def to_dict(self):
+        return {
+            "taps": self.taps,
+            "questions": self.questions,
+            "accuracy": round(self.first_try_correct / self.questions, 4) if self.questions else None,
+            "latency_mean_ms": round(self.latency_total / self.latency_count, 1) if self.latency_count else None,
+            "latency_p50_ms_at_most": self.latency_percentile(50),
+            "latency_p90_ms_at_most": self.latency_percentile(90),
+            "colors": {name: {"questions": asked, "accuracy": round(right / asked, 4)} for name, (asked, right) in sorted(self.colors.items())},
+            "devices": sorted(self.devices),
+        }
+
+def summarize(paths):
+    """Folds every record under paths into per-learner summaries, holding one line at a time."""
+    learners = {}
+    stats = {"files": 0, "records": 0, "bad_lines": 0, "bad_files": 0}
+    for path in iter_log_files(paths):
+        stats["files"] += 1
+        for record in iter_records(path, stats):
+            stats["records"] += 1
+            name = str(record.get("learner", "?"))
+            learner = learners.get(name)
+            if learner is None:
+                learner = learners[name] = LearnerSummary()
+            learner.add(record)
+    return {"input": stats, "learners": {name: summary.to_dict() for name, summary in sorted(learners.items())}}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize Learning Colors Game answer logs per learner")
+    parser.add_argument("paths", nargs="+", help="log files or directories of answers-*.jsonl[.gz] files")
+    parser.add_argument("--output", help="write the JSON summary to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    text = json.dumps(summarize(args.paths), indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
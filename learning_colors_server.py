@@ -0,0 +1,387 @@
+""" Classroom aggregation server for Learning Colors Game stations """
+
+# --- import modules ---
+import os
+import sys
+import json
+import time
+import html
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict
+
+from learning_colors_logs import LearnerSummary, iter_log_files, iter_records
+
+# --- Global Constants and Configuration ---
+SERVER_PORT = 8765 # Stations connect here, see SyncClient in learning_colors_game.py
+DASHBOARD_PORT = 8766 # Teacher dashboard, plain HTTP
+SERVER_LOG_DIR = "classroom_logs" # Received answers, readable by learning_colors_logs.py
+INBOX_SIZE = 256 # Batches accepted but not yet applied; a full inbox stops reading from stations
+MAX_LINE_BYTES = 1024 * 1024 # Largest batch a station may send
+SEEN_BATCHES = 4096 # Batch ids remembered per station, so replayed batches are counted once
+DASHBOARD_REFRESH_SECONDS = 2
+SIMULATED_TAP_SECONDS = 0.01 # Average pause between the answers of a simulated station
+
+def check_batch(batch):
+    """Raises ValueError unless batch has the shape SyncClient sends."""
+    if (not isinstance(batch, dict) or "station" not in batch or not isinstance(batch.get("batch"), (str, int))
+            or not isinstance(batch.get("records"), list) or not all(isinstance(record, dict) for record in batch["records"])):
+        raise ValueError("malformed batch")
+
+class Station:
+    """Connection state and counters of one game station."""
+    def __init__(self, name):
+        self.name = name
+        self.connections = 0
+        self.last_seen = None
+        self.batches = 0
+        self.records = 0
+        self.duplicates = 0
+        self.seen = OrderedDict() # Recent batch ids, oldest first
+
+    def to_dict(self):
+        return {"connected": self.connections > 0, "last_seen": self.last_seen, "batches": self.batches,
+                "records": self.records, "duplicate_batches": self.duplicates}
+
+class ClassroomServer:
+    """Accepts batches from many stations and folds them into per-learner summaries.
+
+    Every station connection reads one batch at a time and waits for it to be applied before
+    acknowledging it, so a slow server pushes back on the stations through TCP instead of
+    buffering without bound.
+    """
+    def __init__(self, log_dir=SERVER_LOG_DIR, inbox_size=INBOX_SIZE):
+        self.log_dir = log_dir
+        self.inbox_size = inbox_size
+        self.learners = {} # learner -> LearnerSummary
+        self.profiles = {} # learner -> latest settings sent by a station
+        self.stations = {}
+        self.writers = set()
+        self.handlers = set() # Station handler tasks, cancelled on stop so none waits on a batch that is never applied
+        self.log_file = None
+        self.log_day = None
+        self.server = None
+        self.dashboard = None
+        self.applier = None
+        self.load_logs()
+
+    def station(self, name):
+        station = self.stations.get(name)
+        if station is None:
+            station = self.stations[name] = Station(name)
+        return station
+
+    def load_logs(self):
+        """Rebuilds the summaries and replay protection from earlier runs."""
+        if not os.path.isdir(self.log_dir):
+            return
+        stats = {"bad_lines": 0, "bad_files": 0}
+        for path in iter_log_files([self.log_dir]):
+            for record in iter_records(path, stats):
+                self.fold(record)
+                station = self.station(record.get("station", "?"))
+                station.records += 1
+                if record.get("batch") not in station.seen:
+                    station.batches += 1
+                    self.remember(station, record.get("batch"))
+
+    def remember(self, station, batch_id):
+        station.seen[batch_id] = True
+        if len(station.seen) > SEEN_BATCHES:
+            station.seen.popitem(last=False)
+
+    def fold(self, record):
+        summary = self.learners.get(record.get("learner", "?"))
+        if summary is None:
+            summary = self.learners[record.get("learner", "?")] = LearnerSummary()
+        summary.add(record)
+
+    async def start(self, host="0.0.0.0", port=SERVER_PORT, dashboard_port=DASHBOARD_PORT):
+        """Starts listening; returns the station port actually bound (useful with port 0)."""
+        self.inbox = asyncio.Queue(self.inbox_size)
+        self.server = await asyncio.start_server(self.handle_station, host, port, limit=MAX_LINE_BYTES)
+        if dashboard_port is not None:
+            self.dashboard = await asyncio.start_server(self.handle_dashboard, host, dashboard_port)
+        self.applier = asyncio.create_task(self.apply_batches())
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Closes every connection; stations keep their batches and replay them later."""
+        for server in (self.server, self.dashboard):
+            if server is not None:
+                server.close()
+        for writer in list(self.writers):
+            writer.close()
+        for handler in list(self.handlers):
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        for server in (self.server, self.dashboard):
+            if server is not None:
+                await server.wait_closed()
+        if self.applier is not None:
+            self.applier.cancel()
+        self.server = self.dashboard = self.applier = None
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    async def handle_station(self, reader, writer):
+        """Reads batches from one station for as long as it stays connected."""
+        self.writers.add(writer)
+        self.handlers.add(asyncio.current_task())
+        station = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                batch = json.loads(line)
+                check_batch(batch)
+                if station is None:
+                    station = self.station(str(batch["station"]))
+                    station.connections += 1
+                applied = asyncio.get_running_loop().create_future()
+                await self.inbox.put((station, batch, applied)) # Waits while the inbox is full
+                await applied
+                writer.write((json.dumps({"ack": batch["batch"]}) + "\n").encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, ValueError, KeyError, asyncio.IncompleteReadError) as e:
+            print(f"Error reading from station {station.name if station else '?'}: {e}")
+        except asyncio.CancelledError:
+            pass # Cut off by stop(); the station replays what was not acknowledged
+        finally:
+            if station is not None:
+                station.connections -= 1
+            self.writers.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def apply_batches(self):
+        while True:
+            station, batch, applied = await self.inbox.get()
+            try:
+                self.apply(station, batch)
+            except OSError as e:
+                applied.set_exception(ConnectionError(f"could not store batch: {e}"))
+            except Exception as e:
+                # Only the station that sent this batch hears about it; the others keep being acknowledged
+                applied.set_exception(ValueError(f"could not apply batch: {e}"))
+            else:
+                applied.set_result(None)
+
+    def apply(self, station, batch):
+        """Stores and folds one batch, unless it is a replay of a batch already applied."""
+        station.last_seen = round(time.time(), 3)
+        if batch["batch"] in station.seen:
+            station.duplicates += 1
+            return
+        answers = []
+        for record in batch["records"]:
+            kind = record.pop("kind", "answer")
+            if kind == "profile":
+                self.profiles[record.get("learner", "?")] = record
+                continue
+            record.setdefault("device", station.name)
+            record["station"] = station.name
+            record["batch"] = batch["batch"]
+            answers.append(record)
+        self.write(answers)
+        for record in answers:
+            self.fold(record)
+        self.remember(station, batch["batch"])
+        station.batches += 1
+        station.records += len(answers)
+
+    def write(self, records):
+        if not records:
+            return
+        day = time.strftime("%Y%m%d")
+        if self.log_file is None or day != self.log_day:
+            if self.log_file is not None:
+                self.log_file.close()
+            os.makedirs(self.log_dir, exist_ok=True)
+            self.log_file = open(os.path.join(self.log_dir, f"answers-{day}-classroom.jsonl"), "a", encoding="utf-8")
+            self.log_day = day
+        self.log_file.write("".join(json.dumps(record) + "\n" for record in records))
+        self.log_file.flush()
+
+    def snapshot(self):
+        return {
+            "learners": {name: summary.to_dict() for name, summary in sorted(self.learners.items())},
+            "profiles": self.profiles,
+            "stations": {name: station.to_dict() for name, station in sorted(self.stations.items())},
+            "inbox": self.inbox.qsize() if self.applier is not None else 0,
+        }
+
+    async def handle_dashboard(self, reader, writer):
+        """Serves the teacher dashboard at / and the raw numbers at /stats.json."""
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                pass # Headers are not needed
+            path = request[1] if len(request) > 1 else "/"
+            if path == "/stats.json":
+                body, content_type = json.dumps(self.snapshot()), "application/json"
+            else:
+                body, content_type = self.dashboard_html(), "text/html; charset=utf-8"
+            data = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        except (ConnectionError, UnicodeDecodeError) as e:
+            print(f"Error serving dashboard: {e}")
+        finally:
+            writer.close()
+
+    def dashboard_html(self):
+        snapshot = self.snapshot()
+        colors = sorted({color for learner in snapshot["learners"].values() for color in learner["colors"]})
+
+        def percent(value):
+            return "-" if value is None else f"{100 * value:.0f}%"
+
+        rows = []
+        for name, learner in snapshot["learners"].items():
+            cells = "".join(f"<td>{percent(learner['colors'][c]['accuracy']) if c in learner['colors'] else ''}</td>" for c in colors)
+            rows.append(f"<tr><th>{html.escape(name)}</th><td>{learner['questions']}</td><td>{percent(learner['accuracy'])}</td>{cells}</tr>")
+        stations = "".join(
+            f"<tr><th>{html.escape(name)}</th><td>{'online' if s['connected'] else 'offline'}</td><td>{s['batches']}</td><td>{s['records']}</td></tr>"
+            for name, s in snapshot["stations"].items())
+        header = "".join(f"<th>{html.escape(c)}</th>" for c in colors)
+        return (f"<!DOCTYPE html><html><head><meta http-equiv='refresh' content='{DASHBOARD_REFRESH_SECONDS}'>"
+                "<title>Learning Colors Classroom</title></head><body>"
+                f"<h1>Learners</h1><table border='1'><tr><th>Learner</th><th>Questions</th><th>Accuracy</th>{header}</tr>{''.join(rows)}</table>"
+                f"<h1>Stations</h1><table border='1'><tr><th>Station</th><th>Status</th><th>Batches</th><th>Answers</th></tr>{stations}</table>"
+                "</body></html>")
+
+# --- Simulated classroom ---
+class ServerThread:
+    """Runs a ClassroomServer on its own event loop, so it can be stopped and restarted from outside."""
+    def __init__(self, server, port=0):
+        self.server = server
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="classroom-server", daemon=True)
+        self.thread.start()
+
+    def call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def start(self):
+        self.port = self.call(self.server.start("127.0.0.1", self.port, dashboard_port=None))
+
+    def stop(self):
+        self.call(self.server.stop())
+
+    def close(self):
+        self.stop()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+def simulate(stations=30, taps=200, outages=2, seed=0):
+    """Plays taps answers on each simulated station against a loopback server that goes offline outages times."""
+    import learning_colors_game as game_module # Only the simulation needs the game's SyncClient
+
+    rng = random.Random(seed)
+    work_dir = tempfile.mkdtemp(prefix="classroom-")
+    server = ServerThread(ClassroomServer(log_dir=os.path.join(work_dir, "logs")))
+    server.start()
+    address = f"127.0.0.1:{server.port}"
+    colors = ["red", "green", "blue", "yellow", "black", "white"]
+    online = threading.Event()
+    online.set()
+    offline_taps = [0] * stations # Answers sent while the server was down, which have to be replayed
+    started_at = time.perf_counter()
+
+    def station(index, station_seed):
+        station_rng = random.Random(station_seed)
+        client = game_module.SyncClient(address, f"station{index:02d}", os.path.join(work_dir, f"outbox{index:02d}.jsonl"))
+        for question in range(taps):
+            target = station_rng.choice(colors)
+            correct = station_rng.random() < 0.7
+            client.send("answer", {
+                "learner": f"learner{index:02d}", "round": f"{index}-{question // 10}", "question": question % 10 + 1,
+                "target": target, "tapped": target if correct else station_rng.choice(colors),
+                "correct": correct, "attempt": 1, "response_ms": round(station_rng.uniform(300, 4000), 1),
+            })
+            offline_taps[index] += not online.is_set()
+            time.sleep(station_rng.uniform(0, 2 * SIMULATED_TAP_SECONDS))
+        client.send("profile", {"learner": f"learner{index:02d}", "num_choices": 3})
+        return client
+
+    threads = []
+    clients = [None] * stations
+    for index in range(stations):
+        thread = threading.Thread(target=lambda i=index, s=rng.random(): clients.__setitem__(i, station(i, s)))
+        thread.start()
+        threads.append(thread)
+    # Outages fall evenly inside the tap stream, so the stations keep answering while the server is down
+    stream_seconds = taps * SIMULATED_TAP_SECONDS
+    for outage in range(outages):
+        down_at = stream_seconds * (outage + 1) / (outages + 1) + rng.uniform(-0.1, 0.1) * stream_seconds / (outages + 1)
+        time.sleep(max(0.0, started_at + down_at - time.perf_counter()))
+        server.stop()
+        online.clear()
+        # Up to a batch flush long, so most stations send into the outage, and over before the next one is due
+        time.sleep(rng.uniform(0.5, 1.0) * min(game_module.SYNC_FLUSH_SECONDS, stream_seconds / (outages + 1)))
+        online.set()
+        server.start()
+    for thread in threads:
+        thread.join()
+    delivered = True
+    for client in clients:
+        client.close(timeout=2 * game_module.SYNC_RETRY_SECONDS[1])
+        delivered &= not client.pending
+    snapshot = server.server.snapshot()
+    server.close()
+    received = sum(s["records"] for s in snapshot["stations"].values())
+    return {
+        "stations": stations,
+        "taps_sent": stations * taps,
+        "answers_received": received,
+        "duplicate_batches_dropped": sum(s["duplicate_batches"] for s in snapshot["stations"].values()),
+        "profiles_received": len(snapshot["profiles"]),
+        "reconnects": sum(client.reconnects for client in clients),
+        "outages": outages,
+        "taps_sent_offline": sum(offline_taps),
+        "all_delivered": delivered and received == stations * taps,
+        "wall_time_s": round(time.perf_counter() - started_at, 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classroom aggregation server for the Learning Colors Game")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="port stations connect to")
+    parser.add_argument("--dashboard-port", type=int, default=DASHBOARD_PORT, help="port of the teacher dashboard")
+    parser.add_argument("--log-dir", default=SERVER_LOG_DIR, help="where received answers are stored")
+    parser.add_argument("--simulate", type=int, metavar="STATIONS",
+                        help="instead of serving, run this many simulated stations against a loopback server and print JSON")
+    parser.add_argument("--taps", type=int, default=200, help="answers per simulated station")
+    parser.add_argument("--outages", type=int, default=2, help="times the simulated server goes offline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.simulate:
+        results = simulate(args.simulate, args.taps, args.outages, args.seed)
+        print(json.dumps(results, indent=4))
+        return 0 if results["all_delivered"] else 1
+
+    async def serve():
+        server = ClassroomServer(args.log_dir)
+        await server.start(args.host, args.port, args.dashboard_port)
+        print(f"Stations: port {args.port}, dashboard: http://{args.host}:{args.dashboard_port}/")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())